@@ -1,52 +1,165 @@
 import argparse
+import csv
 import logging
 import sys
 from pathlib import Path
 from typing import Optional
 import datetime
+import filecmp
 import json
 import shutil
 import os
-import string
 import re
-
-# For table normalization and file outputs
-import pandas as pd
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 from models import Requirement, AcceptanceCriterion
-from writers import write_requirements_jsonl, write_requirements_csv
+from writers import write_requirements_outputs, write_requirements_csv, append_requirements_jsonl, append_requirements_csv
 from extractors import extract_from_rs_text, extract_from_tps_tables, extract_rs_markers_from_tables
 from segmentation import build_requirements_from_markers, build_tps_requirements_from_markers, build_tps_requirements_from_id_tables, consolidate_and_filter_tps, build_tps_requirements_from_markdown, build_tps_requirements_from_plaintext
 from extraction.strategy_base import ExtractionStrategyRegistry, DocumentProfile
 from extraction.classifier import classify_document
 from marker_index import build_marker_index
-from extraction.rs_strategy import RSExtractionStrategy
-from extraction.tps_strategy import TPSExtractionStrategy
-from extraction.fallback_strategy import FallbackStrategy
 from pandoc_normalizer import normalize_docx_with_pandoc, is_normalized_file
 from requirements_validator import validate_requirements_extraction, print_validation_report, save_validation_results
 from utils import build_output_subdir, ensure_output_base
-from statement_extractor import (
-    parse_statement_pdf,
-    STATEMENT_FIELDS,
-    parse_statement_text,
-    excel_preserve_numeric_string,
-    enrich_amounts_from_text,
-)
 
 try:
-    from docling.document_converter import DocumentConverter
-    # Try to import new API components, fall back gracefully
-    try:
-        from docling.datamodel.base_models import DoclingDocument
-        from docling.datamodel.document import ExportType
-        HAS_NEW_API = True
-    except ImportError:
-        HAS_NEW_API = False
-        print("Note: Using legacy docling API. Some features may be limited.", file=sys.stderr)
-except ImportError:
-    print("Error: The 'docling' package is not installed. Please install it using 'pip install docling'", file=sys.stderr)
-    sys.exit(1)
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+
+def _dumps(obj, indent: bool = True, default=None) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes (orjson when installed, stdlib json otherwise)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=option, default=default)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False, default=default).encode("utf-8")
+
+
+def _write_json(path: Path, obj) -> None:
+    """Write obj as indented JSON without building an intermediate str.
+
+    orjson produces bytes directly; the stdlib fallback streams into the file.
+    """
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2))
+        return
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+
+
+def _loads(data):
+    """Parse JSON from str or bytes (orjson when installed, stdlib json otherwise)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _load_json(path: Path):
+    """Parse a JSON file from raw bytes (no intermediate decoded str)."""
+    return _loads(path.read_bytes())
+
+
+_LOG = logging.getLogger("simple")
+
+_UTC = datetime.timezone.utc
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time as ISO-8601 with a 'Z' suffix (second precision)."""
+    return datetime.datetime.now(_UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+# docling is heavy to import; it is loaded on first conversion (see _load_docling)
+_docling_cache: dict = {}
+
+
+def _load_docling() -> dict:
+    """Import docling on first use and memoize DocumentConverter / ExportType / HAS_NEW_API."""
+    if not _docling_cache:
+        try:
+            from docling.document_converter import DocumentConverter
+        except ImportError:
+            print("Error: The 'docling' package is not installed. Please install it using 'pip install docling'", file=sys.stderr)
+            sys.exit(1)
+        # Try to import new API components, fall back gracefully
+        try:
+            from docling.datamodel.base_models import DoclingDocument  # noqa: F401
+            from docling.datamodel.document import ExportType
+            has_new_api = True
+        except ImportError:
+            ExportType = None
+            has_new_api = False
+            print("Note: Using legacy docling API. Some features may be limited.", file=sys.stderr)
+        _docling_cache.update(DocumentConverter=DocumentConverter, ExportType=ExportType, HAS_NEW_API=has_new_api)
+    return _docling_cache
+
+
+# Process-wide DocumentConverter; initialization loads pipelines/models and dominates short conversions
+_CONVERTER_SINGLETON = None
+_CONVERTER_LOCK = threading.Lock()
+
+
+def _get_converter():
+    """Return the shared DocumentConverter, creating it on first use (thread-safe)."""
+    global _CONVERTER_SINGLETON
+    if _CONVERTER_SINGLETON is None:
+        with _CONVERTER_LOCK:
+            if _CONVERTER_SINGLETON is None:
+                _CONVERTER_SINGLETON = _load_docling()["DocumentConverter"]()
+    return _CONVERTER_SINGLETON
+
+
+_STRUCTURAL_EXTRACTOR = None
+
+
+def _get_structural_extractor():
+    """Import docx_structural on first TPS DOCX and memoize its extractor function."""
+    global _STRUCTURAL_EXTRACTOR
+    if _STRUCTURAL_EXTRACTOR is None:
+        from docx_structural import extract_docx_structural_requirements  # lazy import
+        _STRUCTURAL_EXTRACTOR = extract_docx_structural_requirements
+    return _STRUCTURAL_EXTRACTOR
+
+
+# Filename-invalid characters mapped to spaces by sanitize_for_filename
+_SANITIZE_TABLE = str.maketrans({c: " " for c in '<>:"/\\|?*\n\r\t'})
+# Characters outside string.printable (ASCII 0x20-0x7E plus whitespace controls)
+_NON_PRINTABLE_RE = re.compile(r'[^ -~\t\n\r\x0b\x0c]')
+# Plaintext paragraphs starting with N. / N.N. numbering are treated as headings
+_PLAINTEXT_HEADING_RE = re.compile(r'^\d+(?:\.\d+)*\s+.+')
+
+# Front-page detection patterns used when pretty-naming the output folder
+_DOC_QUOTED_RE = re.compile(r'"Document:\s*\n([^"]+)"')
+_DESC_QUOTED_RE = re.compile(r'"Description:\s*\n([^"]+)"')
+_DOC_ID_RE = re.compile(r'\b(\d{4}[-\s]?\d{4})(?:\s*[Vv]\s*\d{1,3})?\b')
+_DOC_ID_NORM_RE = re.compile(r'(\d{4})[-\s]?(\d{4})(?:\D*([Vv]\s*\d{1,3}))?')
+_STD_TOKEN_RE = re.compile(r'\bIEC\b|\bISO\b|\bDIN\b|\bTPS\b|\bRS\b|\bVESTAS\b', re.I)
+# Same characters as _SANITIZE_TABLE minus '/', which descriptions keep
+_DESC_UNSAFE_TABLE = str.maketrans({c: " " for c in '<>:"\\|?*\n\r\t'})
+# Hybrid TPS/RS heuristics in extract_requirements
+_RS_MARKER_RE = re.compile(r'#\s*\d+\s*\.\s*\d+')
+_TPS_NUM_UID_RE = re.compile(r'TPS:(\d{2,4}(?:\.\d+)?)')
+# Front-page type/desc detection only looks at the first 80 markdown lines within this prefix
+_MD_HEAD_CHARS = 16384
+
+
+def _table_info_from_df(table_id: str, df) -> dict:
+    """Build the tables_data.json entry for one exported table DataFrame.
+
+    csv_data stays inline because the marker index, segmentation and extractors
+    all read it from tables_data.json; '\n' line endings keep the payload (and its
+    JSON escaping) compact regardless of platform.
+    """
+    return {
+        "table_id": table_id,
+        "rows": len(df),
+        "columns": len(df.columns),
+        "column_names": list(df.columns),
+        "csv_data": df.to_csv(index=False, lineterminator="\n"),
+    }
 
 
 def setup_logging(level: int = logging.INFO, logfile: Optional[Path] = None) -> None:
@@ -61,7 +174,7 @@ def setup_logging(level: int = logging.INFO, logfile: Optional[Path] = None) ->
 	)
 
 
-def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pandoc_normalization: bool = False, force_type: str | None = None, marker_first: bool = True, compare_tables_pre_post: bool = False) -> dict:
+def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pandoc_normalization: bool = False, force_type: str | None = None, marker_first: bool = True, compare_tables_pre_post: bool = False, sort_structural_merge: bool = False, include_html_tables: bool = False) -> dict:
     """Convert document using docling API with multi-format export and table extraction.
     
     Args:
@@ -69,11 +182,14 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
         out_dir: Output directory for all generated files
         extract_reqs: Whether to extract requirements from the document
         use_pandoc_normalization: Whether to normalize the DOCX with Pandoc before processing
+        sort_structural_merge: Rewrite requirements.jsonl/csv sorted by requirement_uid when merging
+            structural DOCX requirements (default appends the new records only)
+        include_html_tables: Also render each table to HTML (html_data in tables_data.json)
         
     Returns:
         Dictionary mapping output format names to file paths
     """
-    logger = logging.getLogger("simple")
+    logger = _LOG
     out = Path(out_dir)
     out.mkdir(parents=True, exist_ok=True)
     
@@ -84,9 +200,9 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
     try:
         meta_path = out / "source_meta.json"
         meta_payload = {"source_path": str(source_path), "source_name": source_path.name, "source_stem": source_path.stem}
-        meta_path.write_text(json.dumps(meta_payload, indent=2), encoding="utf-8")
+        meta_path.write_bytes(_dumps(meta_payload))
     except Exception:
-        logging.getLogger("simple").debug("Could not write source_meta.json", exc_info=True)
+        _LOG.debug("Could not write source_meta.json", exc_info=True)
 
     # Step 1: (Optional) structural pre-extraction for TPS DOCX using docx2python to preserve numbering
     structural_reqs = []
@@ -97,34 +213,35 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
         forced_tps = (force_type == 'TPS') or ('TPS' in source_path.name.upper())
         if forced_tps:
             try:
-                from docx_structural import extract_docx_structural_requirements  # lazy import
-                struct_candidates = extract_docx_structural_requirements(str(source_path))
+                struct_candidates = _get_structural_extractor()(str(source_path))
                 # Always store (even empty) so downstream debugging can inspect attempt
                 structural_reqs = struct_candidates or []
                 try:
                     structural_json_path = out / "structural_docx_requirements.json"
                     structural_payload = {
                         "source_file": source_path.name,
-                        "generated_at_utc": datetime.datetime.utcnow().isoformat() + "Z",
+                        "generated_at_utc": _utc_now_iso(),
                         "candidate_count": len(struct_candidates),
                         "candidates": struct_candidates,
                     }
-                    structural_json_path.write_text(json.dumps(structural_payload, indent=2, ensure_ascii=False), encoding='utf-8')
-                    logging.getLogger("simple").info(
+                    _write_json(structural_json_path, structural_payload)
+                    _LOG.info(
                         "Structural docx2python scan: %d candidates (written to %s)",
                         len(struct_candidates), structural_json_path)
                 except Exception:
-                    logging.getLogger("simple").warning("Could not write structural_docx_requirements.json", exc_info=True)
+                    _LOG.warning("Could not write structural_docx_requirements.json", exc_info=True)
             except Exception as e:
-                logging.getLogger("simple").debug("Structural DOCX parse skipped (%s)", e, exc_info=True)
+                _LOG.debug("Structural DOCX parse skipped (%s)", e, exc_info=True)
 
-    # Optional: capture pre-normalization tables snapshot for comparison
+    # Optional: capture pre-normalization tables snapshot for comparison.
+    # Only meaningful when Pandoc will actually rewrite the source; otherwise pre == post.
     pre_tables_snapshot = None
-    if compare_tables_pre_post and source_path.suffix.lower() == '.docx':
+    if (compare_tables_pre_post and use_pandoc_normalization and source_path.suffix.lower() == '.docx'
+            and not is_normalized_file(source_path)):
         try:
             tmp_out = out / "__pre_tables__"
             tmp_out.mkdir(parents=True, exist_ok=True)
-            conv_tmp = DocumentConverter()
+            conv_tmp = _get_converter()
             res_pre = conv_tmp.convert(str(source_path))
             doc_pre = getattr(res_pre, "document", None)
             pre_tables = {}
@@ -132,18 +249,12 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                 for i, table in enumerate(getattr(doc_pre, "tables", [])):
                     try:
                         df = table.export_to_dataframe()
-                        pre_tables[f"table_{i+1}"] = {
-                            "table_id": f"table_{i+1}",
-                            "rows": len(df),
-                            "columns": len(df.columns),
-                            "column_names": list(df.columns),
-                            "csv_data": df.to_csv(index=False),
-                        }
+                        pre_tables[f"table_{i+1}"] = _table_info_from_df(f"table_{i+1}", df)
                     except Exception:
                         pass
             pre_tables_snapshot = pre_tables
         except Exception:
-            logging.getLogger("simple").debug("Could not capture pre-normalization tables", exc_info=True)
+            _LOG.debug("Could not capture pre-normalization tables", exc_info=True)
 
     # Step 2: Pandoc normalization if requested
     if use_pandoc_normalization and source_path.suffix.lower() == '.docx':
@@ -173,16 +284,18 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
         # Minimal JSON blocks: split paragraphs by blank lines
         paragraphs = [p.strip() for p in raw_text.split('\n\n') if p.strip()]
         blocks = []
+        heading_match = _PLAINTEXT_HEADING_RE.match
         for p in paragraphs:
             # treat lines starting with digits pattern N. or N.N. as headings else paragraph
-            if re.match(r'^\d+(?:\.\d+)*\s+.+', p) and len(p.split()) < 25:
-                blocks.append({'type': 'heading', 'level': 1, 'text': p.split('\n')[0][:200]})
+            # (bounded split: only need to know whether there are fewer than 25 words)
+            if heading_match(p) and len(p.split(None, 25)) < 25:
+                blocks.append({'type': 'heading', 'level': 1, 'text': p.partition('\n')[0][:200]})
             else:
                 blocks.append({'type': 'paragraph', 'text': p[:2000]})
         json_path = out / 'document.json'
-        json_path.write_text(json.dumps({'blocks': blocks}, indent=2), encoding='utf-8')
+        json_path.write_bytes(_dumps({'blocks': blocks}))
         # Write a placeholder tables_data.json (empty)
-        (out / 'tables_data.json').write_text(json.dumps({}, indent=2), encoding='utf-8')
+        (out / 'tables_data.json').write_bytes(_dumps({}))
         logger.info("Wrote minimal plaintext artifacts (markdown, json, tables_data)")
         output_files = {"markdown": str(md_path), "json": str(json_path), "output_dir": str(out)}
         if extract_reqs:
@@ -193,9 +306,11 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                 logger.error("Plaintext requirements extraction failed: %s", e)
         return output_files
 
+    docling_api = _load_docling()
+    ExportType = docling_api["ExportType"]
     logger.debug("Creating DocumentConverter instance")
     try:
-        conv = DocumentConverter()
+        conv = _get_converter()
     except Exception as e:
         logger.exception("Failed to instantiate DocumentConverter: %s", e)
         raise
@@ -216,30 +331,28 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
 
     try:
         # Try new API first, fall back to legacy methods
-        use_new_api = HAS_NEW_API and hasattr(result, 'render')
+        use_new_api = docling_api["HAS_NEW_API"] and hasattr(result, 'render')
         
         if use_new_api:
             try:
                 # 1) Lossless JSON (full fidelity)
-                json_str = result.render(ExportType.JSON)
-                json_path = out / "document.json"
-                json_path.write_text(json_str, encoding="utf-8")
-                output_files["json"] = str(json_path)
-                logger.info("Wrote JSON to %s", json_path)
-
                 # 2) DocTags (LLM-friendly, compact structural text)
-                doctags_str = result.render(ExportType.DOC_TAGS)
-                doctags_path = out / "document.doctags.txt"
-                doctags_path.write_text(doctags_str, encoding="utf-8")
-                output_files["doctags"] = str(doctags_path)
-                logger.info("Wrote DocTags to %s", doctags_path)
-
                 # 3) Markdown (readable; good for quick review)
-                md_str = result.render(ExportType.MARKDOWN)
-                md_path = out / "document.md"
-                md_path.write_text(md_str, encoding="utf-8")
-                output_files["markdown"] = str(md_path)
-                logger.info("Wrote Markdown to %s", md_path)
+                # Rendering stays on this thread; each file write overlaps with the next render.
+                exports = (
+                    ("json", ExportType.JSON, out / "document.json", "JSON"),
+                    ("doctags", ExportType.DOC_TAGS, out / "document.doctags.txt", "DocTags"),
+                    ("markdown", ExportType.MARKDOWN, out / "document.md", "Markdown"),
+                )
+                with ThreadPoolExecutor(max_workers=1) as write_pool:
+                    pending = []
+                    for key, export_type, export_path, label in exports:
+                        rendered = result.render(export_type)
+                        pending.append((key, export_path, label, write_pool.submit(export_path.write_text, rendered, encoding="utf-8")))
+                    for key, export_path, label, write_future in pending:
+                        write_future.result()
+                        output_files[key] = str(export_path)
+                        logger.info("Wrote %s to %s", label, export_path)
             except Exception as e:
                 logger.warning("New API render failed, falling back to legacy: %s", e)
                 use_new_api = False
@@ -263,9 +376,9 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                 elif hasattr(doc, "json"):
                     json_str = doc.json(indent=2)
                 elif hasattr(doc, "model_dump"):
-                    json_str = json.dumps(doc.model_dump(), indent=2, default=str)
+                    json_str = _dumps(doc.model_dump(), default=str).decode("utf-8")
                 else:
-                    json_str = json.dumps({"document": str(doc)}, indent=2)
+                    json_str = _dumps({"document": str(doc)}).decode("utf-8")
                 
                 json_path = out / "document.json"
                 json_path.write_text(json_str, encoding="utf-8")
@@ -275,6 +388,7 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                 logger.warning("Failed to export JSON: %s", e)
 
         # 4) Tables: extract and include in main outputs
+        table_details = None  # kept for front-page detection after extraction
         tables = getattr(doc, "tables", [])
         if tables:
             logger.info("Found %d tables, processing table data for inclusion in main outputs.", len(tables))
@@ -286,28 +400,17 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
             for i, table in enumerate(tables):
                 try:
                     # Use the built-in method to get a DataFrame
-                    table_df: pd.DataFrame = table.export_to_dataframe()
+                    table_df = table.export_to_dataframe()
                     table_id = f"table_{i+1}"
                     
                     # Create table summary info
-                    table_info = {
-                        "table_id": table_id,
-                        "rows": len(table_df),
-                        "columns": len(table_df.columns),
-                        "column_names": list(table_df.columns),
-                        "csv_data": table_df.to_csv(index=False),
-                    }
+                    table_info = _table_info_from_df(table_id, table_df)
                     
-                    # Add HTML representation if available
-                    if hasattr(table, "export_to_html"):
+                    # Add HTML representation if requested and available (expensive; off by default)
+                    if include_html_tables and hasattr(table, "export_to_html"):
                         table_info["html_data"] = table.export_to_html(doc=doc)
                     
-                    tables_summary.append({
-                        "table_id": table_id,
-                        "rows": table_info["rows"],
-                        "columns": table_info["columns"],
-                        "column_names": table_info["column_names"]
-                    })
+                    tables_summary.append((table_id, table_info["rows"], table_info["columns"], table_info["column_names"]))
                     
                     table_details[table_id] = table_info
                     logger.info(f"Processed table {i+1}: {table_info['rows']} rows, {table_info['columns']} columns")
@@ -317,26 +420,27 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
             
             # Save tables summary as a separate CSV for quick reference
             if tables_summary:
-                summary_df = pd.DataFrame(tables_summary)
+                # A handful of 4-column rows: stdlib csv is enough, no DataFrame needed
                 tables_info_path = out / "tables_info.csv"
-                summary_df.to_csv(tables_info_path, index=False)
+                with tables_info_path.open("w", newline="", encoding="utf-8") as f:
+                    summary_writer = csv.writer(f, lineterminator="\n")
+                    summary_writer.writerow(["table_id", "rows", "columns", "column_names"])
+                    summary_writer.writerows(tables_summary)
                 output_files["tables_info"] = str(tables_info_path)
                 logger.info(f"Wrote table summary to {tables_info_path}")
                 
-                # Also save detailed table data as JSON
+                # Also save detailed table data as JSON (encoded once; reused for the post snapshot)
                 tables_json_path = out / "tables_data.json"
-                with tables_json_path.open("w", encoding="utf-8") as f:
-                    json.dump(table_details, f, indent=2, ensure_ascii=False)
+                tables_json_bytes = _dumps(table_details)
+                tables_json_path.write_bytes(tables_json_bytes)
                 output_files["tables_data"] = str(tables_json_path)
                 logger.info(f"Wrote detailed table data to {tables_json_path}")
 
                 # If requested, save pre/post comparison snapshots
                 if compare_tables_pre_post and pre_tables_snapshot is not None:
                     try:
-                        with (out / "tables_data.pre.json").open("w", encoding="utf-8") as fpre:
-                            json.dump(pre_tables_snapshot, fpre, indent=2, ensure_ascii=False)
-                        with (out / "tables_data.post.json").open("w", encoding="utf-8") as fpost:
-                            json.dump(table_details, fpost, indent=2, ensure_ascii=False)
+                        (out / "tables_data.pre.json").write_bytes(_dumps(pre_tables_snapshot))
+                        (out / "tables_data.post.json").write_bytes(tables_json_bytes)
                         output_files["tables_data_pre"] = str(out / "tables_data.pre.json")
                         output_files["tables_data_post"] = str(out / "tables_data.post.json")
                         logger.info("Wrote pre/post tables snapshots for comparison")
@@ -364,7 +468,7 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                     existing_uids = set()
                     for line in existing_lines:
                         try:
-                            obj = json.loads(line)
+                            obj = _loads(line)
                             existing_uids.add(obj.get('requirement_uid'))
                         except Exception:
                             continue
@@ -407,31 +511,36 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                         existing_uids.add(uid)
                         added += 1
                     if added:
-                        logging.getLogger("simple").info("Merging %d structural DOCX requirements (docx2python) into JSONL", added)
-                        # Rewrite JSONL with existing + new (sorted)
-                        all_objs = [json.loads(l) for l in existing_lines if l.strip()]
-                        all_objs.extend(new_objs)
-                        # Simple deterministic sort: by requirement_uid
-                        all_objs.sort(key=lambda o: o.get('requirement_uid',''))
-                        with req_jsonl_path.open('w', encoding='utf-8') as f:
-                            for obj in all_objs:
-                                f.write(json.dumps(obj, ensure_ascii=False) + '\n')
-                        # Also update CSV (append naive)
+                        _LOG.info("Merging %d structural DOCX requirements (docx2python) into JSONL", added)
                         req_csv_path = Path(req_output_files.get('requirements_csv', out / 'requirements.csv'))
-                        try:
-                            import csv
-                            # Rebuild CSV from JSONL for simplicity
-                            import io
-                            fieldnames = sorted({k for obj in all_objs for k in obj.keys()})
-                            with req_csv_path.open('w', newline='', encoding='utf-8') as cf:
-                                writer = csv.DictWriter(cf, fieldnames=fieldnames)
-                                writer.writeheader()
-                                for obj in all_objs:
-                                    writer.writerow(obj)
-                        except Exception:
-                            logging.getLogger("simple").warning("Could not update requirements.csv after structural merge", exc_info=True)
+                        if not sort_structural_merge:
+                            # Append only the new records; existing rows are left untouched
+                            new_reqs = [Requirement(**obj) for obj in new_objs]
+                            append_requirements_jsonl(new_reqs, req_jsonl_path)
+                            try:
+                                append_requirements_csv(new_reqs, req_csv_path)
+                            except Exception:
+                                _LOG.warning("Could not update requirements.csv after structural merge", exc_info=True)
+                        else:
+                            # Rewrite JSONL with existing + new (sorted)
+                            all_objs = [_loads(l) for l in existing_lines if l.strip()]
+                            all_objs.extend(new_objs)
+                            # Simple deterministic sort: by requirement_uid
+                            all_objs.sort(key=lambda o: o.get('requirement_uid',''))
+                            # Write to a temp file and os.replace so readers never see a truncated file
+                            encoded = [_dumps(obj, indent=False) for obj in all_objs]
+                            tmp_jsonl_path = req_jsonl_path.with_name(req_jsonl_path.name + '.tmp')
+                            tmp_jsonl_path.write_bytes(b'\n'.join(encoded) + b'\n')
+                            os.replace(tmp_jsonl_path, req_jsonl_path)
+                            try:
+                                # Rebuild CSV with the same schema as every other requirements.csv
+                                tmp_csv_path = req_csv_path.with_name(req_csv_path.name + '.tmp')
+                                write_requirements_csv([Requirement(**obj) for obj in all_objs], tmp_csv_path)
+                                os.replace(tmp_csv_path, req_csv_path)
+                            except Exception:
+                                _LOG.warning("Could not update requirements.csv after structural merge", exc_info=True)
                 except Exception:
-                    logging.getLogger("simple").warning("Structural requirements merge failed", exc_info=True)
+                    _LOG.warning("Structural requirements merge failed", exc_info=True)
             output_files.update(req_output_files)
             logger.info("Finished requirements extraction.")
         except Exception as e:
@@ -443,14 +552,12 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
         def sanitize_for_filename(s: str) -> str:
             if not s:
                 return ""
-            invalid = '<>:"/\\|?*\n\r\t'
-            table = str.maketrans({c: " " for c in invalid})
-            out_s = s.translate(table)
-            out_s = "".join(ch for ch in out_s if ch in string.printable)
+            out_s = s.translate(_SANITIZE_TABLE)
+            out_s = _NON_PRINTABLE_RE.sub("", out_s)
             out_s = " ".join(out_s.split())
             return out_s.strip()
 
-        def find_doc_frontpage_info(out_path: Path) -> dict:
+        def find_doc_frontpage_info(out_path: Path, tables_dict: dict | None = None) -> dict:
             info = {"type": None, "id": None, "desc": None}
             doc_json_path = out_path / "document.json"
             tables_json_path = out_path / "tables_data.json"
@@ -458,29 +565,32 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
             text_lines = []
             # First, try to extract Document/Description from tables_data.json (common front page pattern)
             try:
-                if tables_json_path.exists():
-                    tbl_raw = json.loads(tables_json_path.read_text(encoding="utf-8"))
+                # Prefer the in-memory tables from this run; only re-read the file when unavailable
+                tbl_raw = tables_dict
+                if tbl_raw is None and tables_json_path.exists():
+                    tbl_raw = _load_json(tables_json_path)
+                if tbl_raw:
                     # look for table entries that include 'Document:' and 'Description:' cells
                     for t in tbl_raw.values():
-                        csv = t.get("csv_data", "")
-                        if not csv:
+                        csv_text = t.get("csv_data", "")
+                        if not csv_text:
                             continue
                         # simple search for labels
-                        if "Document:" in csv or "Description:" in csv:
+                        if "Document:" in csv_text or "Description:" in csv_text:
                             # Handle multiline cells with Document:\nA012-5599 VER 05 format
                             # First try to extract from quoted cells that span multiple lines
-                            doc_match = re.search(r'"Document:\s*\n([^"]+)"', csv)
+                            doc_match = _DOC_QUOTED_RE.search(csv_text)
                             if doc_match:
                                 val = doc_match.group(1).strip()
                                 if val and not val.lower() in ('confidential', 'tbd', 'tba'):
                                     info["id"] = val
-                            desc_match = re.search(r'"Description:\s*\n([^"]+)"', csv)
+                            desc_match = _DESC_QUOTED_RE.search(csv_text)
                             if desc_match:
                                 val = desc_match.group(1).strip()
                                 if val and not val.lower() in ('confidential', 'tbd', 'tba'):
                                     info["desc"] = val
                             # Also try single-line format
-                            for line in csv.splitlines():
+                            for line in csv_text.splitlines():
                                 if line.strip().startswith("Document:"):
                                     val = line.split("Document:", 1)[1].strip().strip('"')
                                     if val and not info.get("id") and not val.lower() in ('confidential', 'tbd', 'tba'):
@@ -496,7 +606,7 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                 pass
             try:
                 if doc_json_path.exists():
-                    raw = json.loads(doc_json_path.read_text(encoding="utf-8"))
+                    raw = _load_json(doc_json_path)
                     blocks = None
                     if isinstance(raw, dict):
                         if "blocks" in raw:
@@ -517,8 +627,10 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                 pass
             try:
                 if not text_lines and md_path.exists():
-                    lines = md_path.read_text(encoding="utf-8").splitlines()
-                    for l in lines[:80]:
+                    # Only the front page matters; read a bounded prefix instead of the whole markdown file
+                    with md_path.open(encoding="utf-8") as mf:
+                        md_head = mf.read(_MD_HEAD_CHARS)
+                    for l in md_head.splitlines()[:80]:
                         if l.strip():
                             text_lines.append(l.strip())
             except Exception:
@@ -539,7 +651,7 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
 
             # If not already set by tables, try regex on joined text for doc id
             if not info.get("id"):
-                m = re.search(r'\b(\d{4}[-\s]?\d{4})(?:\s*[Vv]\s*\d{1,3})?\b', joined)
+                m = _DOC_ID_RE.search(joined)
                 if m:
                     info["id"] = m.group(0).replace(" ", "")
 
@@ -552,7 +664,7 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                     continue
                 up_words = up.split()
                 if len(up_words) >= 3 and len(up) > 10:
-                    if not re.search(r'\bIEC\b|\bISO\b|\bDIN\b|\bTPS\b|\bRS\b|\bVESTAS\b', up, re.I):
+                    if not _STD_TOKEN_RE.search(up):
                         desc = up
                         break
             if not desc and text_lines:
@@ -565,7 +677,7 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
             if not raw:
                 return ""
             # Normalize variations like 01014242V05, 0101-4242V05, 0101-4242 V05 -> '0101-4242 V05'
-            m = re.search(r'(\d{4})[-\s]?(\d{4})(?:\D*([Vv]\s*\d{1,3}))?', raw)
+            m = _DOC_ID_NORM_RE.search(raw)
             if not m:
                 return raw.strip()
             part1 = m.group(1)
@@ -587,26 +699,17 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
             desc = desc.replace("/", "/").replace("&", "&")
             desc = " ".join(desc.split())[:120]
             # Remove problematic punctuation from description but keep slashes and ampersands
-            desc = re.sub(r'[<>:\\"\|\?\*\n\r\t]', ' ', desc)
+            desc = desc.translate(_DESC_UNSAFE_TABLE)
             desc = desc.strip(" -_.,")
-            parts = []
-            if typ:
-                parts.append(typ)
-            if docid:
-                parts.append(docid)
-            if desc:
-                parts.append(desc)
-            if not parts:
-                return sanitize_for_filename(fallback)
-            pretty = " - ".join(parts)
-            return sanitize_for_filename(pretty)
+            pretty = " - ".join(p for p in (typ, docid, desc) if p)
+            return sanitize_for_filename(pretty or fallback)
 
         # Determine base name from output directory
         base_name = out.name
         if base_name.endswith("_output"):
             base_name = base_name[:-7]
         
-        pretty_info = find_doc_frontpage_info(out)
+        pretty_info = find_doc_frontpage_info(out, tables_dict=table_details)
         pretty_base = assemble_pretty_name(pretty_info, base_name)
         if pretty_base and pretty_base != base_name:
             parent = out.parent
@@ -615,14 +718,17 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
             while candidate.exists():
                 candidate = parent / f"{pretty_base}_output_run{suffix}"
                 suffix += 1
-            shutil.move(str(out), str(candidate))
-            # update output_files values to new folder
-            for k, v in list(output_files.items()):
-                try:
-                    p = Path(v)
-                    output_files[k] = str(candidate / p.name)
-                except Exception:
-                    pass
+            # Same parent directory: a plain rename; shutil.move only if that fails (e.g. cross-device)
+            try:
+                os.rename(out, candidate)
+            except OSError:
+                shutil.move(str(out), str(candidate))
+            # update output_files values to new folder; keep a reverse index path -> keys for the renames below
+            keys_by_path = {}
+            for k, v in output_files.items():
+                new_v = str(candidate / Path(v).name)
+                output_files[k] = new_v
+                keys_by_path.setdefault(new_v, []).append(k)
 
             # Also rename common artifact files inside the folder to include the pretty base as prefix
             try:
@@ -640,31 +746,30 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
                     "structural_docx_requirements.json",
                     "source_meta.json",
                 ]
+                # One directory listing instead of an exists() stat per candidate/destination name
+                present = {entry.name for entry in os.scandir(candidate)}
                 for fname in files_to_prefix:
-                    src = candidate / fname
-                    if not src.exists():
+                    if fname not in present:
                         continue
                     # skip if already prefixed
-                    if src.name.startswith(pretty_base):
+                    if fname.startswith(pretty_base):
                         continue
                     new_name = f"{pretty_base} - {fname}"
-                    dst = candidate / new_name
                     # avoid overwriting existing file
-                    if dst.exists():
+                    if new_name in present:
                         # append run suffix
                         i = 1
-                        while (candidate / f"{pretty_base} - {i} - {fname}").exists():
+                        while f"{pretty_base} - {i} - {fname}" in present:
                             i += 1
-                        dst = candidate / f"{pretty_base} - {i} - {fname}"
-                    src.rename(dst)
+                        new_name = f"{pretty_base} - {i} - {fname}"
+                    src = candidate / fname
+                    dst = candidate / new_name
+                    os.rename(src, dst)
+                    present.discard(fname)
+                    present.add(new_name)
                     # update output_files mapping if it referenced the old name
-                    for k, v in list(output_files.items()):
-                        try:
-                            pv = Path(v)
-                            if pv == src:
-                                output_files[k] = str(dst)
-                        except Exception:
-                            pass
+                    for k in keys_by_path.pop(str(src), ()):
+                        output_files[k] = str(dst)
             except Exception:
                 logger.debug("Failed to prefix internal files", exc_info=True)
             out = candidate
@@ -681,21 +786,94 @@ def convert_docx(source: str, out_dir: str, extract_reqs: bool = True, use_pando
             if not struct_json.exists():
                 payload = {
                     "source_file": source_path.name,
-                    "generated_at_utc": datetime.datetime.utcnow().isoformat()+"Z",
+                    "generated_at_utc": _utc_now_iso(),
                     "candidate_count": len(structural_reqs) if 'structural_reqs' in locals() else 0,
                     "candidates": structural_reqs if 'structural_reqs' in locals() else [],
                     "note": "Created fallback (no structural candidates captured in primary pass)"
                 }
-                struct_json.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
-                logging.getLogger("simple").info("Created fallback structural_docx_requirements.json (candidates=%d)", payload["candidate_count"])
+                _write_json(struct_json, payload)
+                _LOG.info("Created fallback structural_docx_requirements.json (candidates=%d)", payload["candidate_count"])
     except Exception:
-        logging.getLogger("simple").debug("Could not ensure structural_docx_requirements.json", exc_info=True)
+        _LOG.debug("Could not ensure structural_docx_requirements.json", exc_info=True)
     return output_files
 
 
+def _get_strategy_cls(doc_type: str):
+    """Import and register the extraction strategies on first use; return the class for doc_type."""
+    from extraction.rs_strategy import RSExtractionStrategy
+    from extraction.tps_strategy import TPSExtractionStrategy
+    from extraction.fallback_strategy import FallbackStrategy
+    # Register strategies (idempotent)
+    ExtractionStrategyRegistry.register("RS", RSExtractionStrategy)
+    ExtractionStrategyRegistry.register("TPS", TPSExtractionStrategy)
+    ExtractionStrategyRegistry.register("UNKNOWN", FallbackStrategy)
+    return ExtractionStrategyRegistry.get(doc_type) or FallbackStrategy
+
+
+_HEADING_LABELS = frozenset(("heading", "header"))
+_PARAGRAPH_LABELS = frozenset(("paragraph", "list", "inline"))
+
+
+def _blocks_from_docling_texts(texts: list) -> list:
+    """Synthesize heading/paragraph blocks from a docling 'texts' list."""
+    blocks = []
+    for t in texts:
+        if not isinstance(t, dict):
+            continue
+        text = t.get("text") or ""
+        if not text:
+            continue
+        label = (t.get("label") or "").lower()
+        if label in _HEADING_LABELS:
+            # Try to infer level from name like 'header-0' in groups or default 1
+            blocks.append({"type": "heading", "level": 1, "text": text})
+        elif label in _PARAGRAPH_LABELS:
+            blocks.append({"type": "paragraph", "text": text})
+    return blocks
+
+
+def _merge_new_requirements(requirements: list, uid_index: dict, candidates: list) -> list:
+    """Append candidates whose UID is not yet in uid_index and return them.
+
+    Membership is checked against the UIDs known before this batch, so duplicates within
+    `candidates` are kept for consolidate_and_filter_tps to choose between.
+    """
+    new = [r for r in candidates if r.requirement_uid not in uid_index]
+    requirements.extend(new)
+    for r in new:
+        uid_index.setdefault(r.requirement_uid, r)
+    return new
+
+
+# The hybrid RS-marker check only inspects this many characters of paragraph text
+_HYBRID_TEXT_LIMIT = 200000
+
+
+def _count_rs_markers(text: str) -> int:
+    """Count RS-style '#N.N' markers without materializing the match list."""
+    return sum(1 for _ in _RS_MARKER_RE.finditer(text))
+
+
+def _paragraph_text(doc_json: dict, limit: int) -> str:
+    """Join paragraph block texts with newlines, truncated to `limit` characters.
+
+    Stops walking blocks once the limit is reached instead of joining the whole document.
+    """
+    parts = []
+    remaining = limit
+    for b in doc_json.get("blocks", []):
+        if isinstance(b, dict) and b.get("type") == "paragraph":
+            text = b.get("text", "")
+            parts.append(text)
+            remaining -= len(text) + 1
+            if remaining < 0:
+                break
+    return "\n".join(parts)[:limit]
+
+
 def extract_requirements(out_dir: Path, force_type: str | None = None, marker_first: bool = True) -> dict:
     """Extracts requirements from generated doc artifacts and writes JSONL/CSV."""
-    logger = logging.getLogger("simple")
+    logger = _LOG
 
     doc_json_path = out_dir / "document.json"
     tables_json_path = out_dir / "tables_data.json"
@@ -710,29 +888,17 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
     doc_json = {"blocks": []}
     try:
         if doc_json_path.exists():
-            raw = json.loads(doc_json_path.read_text(encoding="utf-8"))
-            # Some exports may nest content; prefer a top-level with blocks
-            if isinstance(raw, dict) and "blocks" in raw:
-                doc_json = raw
-            elif isinstance(raw, dict) and "document" in raw and isinstance(raw["document"], dict):
-                if "blocks" in raw["document"]:
-                    doc_json = raw["document"]
-            # Fallback: synthesize blocks from docling 'texts' list if no blocks were found
-            if (not doc_json.get("blocks")) and isinstance(raw, dict) and "texts" in raw and isinstance(raw["texts"], list):
-                blocks = []
-                for t in raw["texts"]:
-                    if not isinstance(t, dict):
-                        continue
-                    label = (t.get("label") or "").lower()
-                    text = t.get("text") or ""
-                    if not text:
-                        continue
-                    if label in ("heading", "header"):
-                        # Try to infer level from name like 'header-0' in groups or default 1
-                        blocks.append({"type": "heading", "level": 1, "text": text})
-                    elif label in ("paragraph", "list", "inline"):
-                        blocks.append({"type": "paragraph", "text": text})
-                doc_json = {"blocks": blocks}
+            raw = _load_json(doc_json_path)
+            if isinstance(raw, dict):
+                # Some exports may nest content; prefer a top-level with blocks
+                nested = raw.get("document")
+                if "blocks" in raw:
+                    doc_json = raw
+                elif isinstance(nested, dict) and "blocks" in nested:
+                    doc_json = nested
+                # Fallback: synthesize blocks from docling 'texts' list only if no blocks were found
+                if not doc_json.get("blocks") and isinstance(raw.get("texts"), list):
+                    doc_json = {"blocks": _blocks_from_docling_texts(raw["texts"])}
     except Exception as e:
         logger.warning("Could not parse document.json for extraction: %s", e)
 
@@ -740,17 +906,12 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
     tables_data = {}
     try:
         if tables_json_path.exists():
-            tables_data = json.loads(tables_json_path.read_text(encoding="utf-8"))
+            tables_data = _load_json(tables_json_path)
             # Our TPS extractor expects a dict of table_id -> { csv_data: ... }
             # The saved structure already matches this shape.
     except Exception as e:
         logger.warning("Could not parse tables_data.json for extraction: %s", e)
 
-    # Register strategies (idempotent)
-    ExtractionStrategyRegistry.register("RS", RSExtractionStrategy)
-    ExtractionStrategyRegistry.register("TPS", TPSExtractionStrategy)
-    ExtractionStrategyRegistry.register("UNKNOWN", FallbackStrategy)
-
     # Build marker index pre-pass (used for improved classification and later segmentation)
     marker_idx = build_marker_index(doc_json, tables_data)
     logger.info("Marker index built: RS markers=%d TPS markers=%d total=%d", marker_idx.rs_count(), marker_idx.tps_count(), len(marker_idx.markers))
@@ -780,9 +941,14 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
             # Load optional pre-normalization tables snapshot if present
             pre_tables_path = out_dir / "tables_data.pre.json"
             pre_tables_data = None
+            # Normalization often leaves the tables untouched; a byte-identical snapshot
+            # would only repeat the post extraction, so reuse that result instead
+            pre_same_as_post = False
             if pre_tables_path.exists():
                 try:
-                    pre_tables_data = json.loads(pre_tables_path.read_text(encoding="utf-8"))
+                    pre_same_as_post = tables_json_path.exists() and filecmp.cmp(pre_tables_path, tables_json_path, shallow=False)
+                    if not pre_same_as_post:
+                        pre_tables_data = _load_json(pre_tables_path)
                 except Exception:
                     logger.debug("Could not parse tables_data.pre.json", exc_info=True)
 
@@ -792,7 +958,10 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
 
             id_report_pre = {}
             pre_id_reqs = []
-            if pre_tables_data:
+            if pre_same_as_post:
+                id_report_pre = id_report_post
+                pre_id_reqs = post_id_reqs
+            elif pre_tables_data:
                 pre_id_reqs = build_tps_requirements_from_id_tables(pre_tables_data, doc_meta, id_report_pre)
 
             # Merge unique by requirement_uid, preferring post version if duplicate
@@ -821,8 +990,7 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
                         }
                     }
                     report_path = out_dir / "table_id_detection_report.json"
-                    with report_path.open("w", encoding="utf-8") as rf:
-                        json.dump(report_payload, rf, indent=2, ensure_ascii=False)
+                    report_path.write_bytes(_dumps(report_payload))
                     logger.info("Wrote table ID detection report to %s", report_path)
                 except Exception:
                     logger.debug("Could not write table_id_detection_report.json", exc_info=True)
@@ -830,6 +998,8 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
                 logger.info("No ID-table style TPS requirements found (pre/post)")
         except Exception:
             logger.exception("ID-table extraction failed; continuing")
+        # UID -> requirement index maintained across the merge phases below
+        uid_index = {r.requirement_uid: r for r in requirements}
         # Plaintext fallback (if original source was .txt saved alongside outputs)
         try:
             # Heuristic: look for sibling txt with same base name (pretty-named folder) or use original input path
@@ -842,7 +1012,7 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
             else:
                 # Try original source path from source_meta.json
                 try:
-                    meta = json.loads((out_dir / "source_meta.json").read_text(encoding='utf-8'))
+                    meta = _load_json(out_dir / "source_meta.json")
                     src_stem = meta.get("source_stem")
                     src_path = Path(meta.get("source_path", ""))
                     if src_stem and src_path and src_path.exists():
@@ -853,11 +1023,9 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
                     logger.debug("Could not read source_meta.json for plaintext fallback", exc_info=True)
             if raw_text:
                 pt_reqs = build_tps_requirements_from_plaintext(raw_text, doc_meta)
-                existing_uids = {r.requirement_uid for r in requirements}
-                new_pt = [r for r in pt_reqs if r.requirement_uid not in existing_uids]
+                new_pt = _merge_new_requirements(requirements, uid_index, pt_reqs)
                 if new_pt:
                     logger.info("Plaintext fallback extracted %d TPS requirements", len(new_pt))
-                    requirements.extend(new_pt)
         except Exception:
             logger.exception("Plaintext fallback TPS extraction failed")
         # Markdown fallback hierarchical parser (4.1.1.1 style) before marker-first
@@ -866,27 +1034,21 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
             if md_path.exists():
                 md_text = md_path.read_text(encoding='utf-8')
                 md_reqs = build_tps_requirements_from_markdown(md_text, doc_meta)
-                existing_uids = {r.requirement_uid for r in requirements}
-                new_md = [r for r in md_reqs if r.requirement_uid not in existing_uids]
+                new_md = _merge_new_requirements(requirements, uid_index, md_reqs)
                 if new_md:
                     logger.info("Markdown fallback extracted %d hierarchical TPS requirements", len(new_md))
-                    requirements.extend(new_md)
         except Exception:
             logger.exception("Markdown fallback TPS extraction failed")
         # Proceed with marker-first for remaining content
         try:
             tps_reqs = build_tps_requirements_from_markers(marker_idx, doc_json, doc_meta, tables_data)
             # Merge, avoiding UIDs already present from ID tables
-            existing_uids = {r.requirement_uid for r in requirements}
-            added = 0
-            for r in tps_reqs:
-                if r.requirement_uid not in existing_uids:
-                    requirements.append(r)
-                    added += 1
+            added = len(_merge_new_requirements(requirements, uid_index, tps_reqs))
             logger.info("TPS marker-first segmentation produced %d new + %d existing = %d total", added, len(requirements)-added, len(requirements))
             # Consolidate & filter noise
             pre_cons = len(requirements)
             requirements = consolidate_and_filter_tps(requirements, tables_data)
+            uid_index = {r.requirement_uid: r for r in requirements}
             logger.info("Consolidated TPS requirements: %d -> %d after filtering", pre_cons, len(requirements))
             if len(requirements) < 10 and marker_idx.tps_count() > 50:
                 logger.info("Combined TPS extraction still sparse (%d); enabling strategy augmentation", len(requirements))
@@ -902,7 +1064,7 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
         marker_first = False
 
     if not marker_first:
-        strategy_cls = ExtractionStrategyRegistry.get(profile.doc_type) or FallbackStrategy
+        strategy_cls = _get_strategy_cls(profile.doc_type)
         strategy = strategy_cls(profile, doc_json, tables_data, doc_meta)
         try:
             strategy.prepare()
@@ -915,17 +1077,12 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
     elif profile.doc_type == 'TPS' and marker_first and 'extra_strategy' in locals() and extra_strategy:
         # We already have marker-first requirements in 'requirements'; run strategy and merge
         try:
-            strategy_cls = ExtractionStrategyRegistry.get(profile.doc_type) or FallbackStrategy
+            strategy_cls = _get_strategy_cls(profile.doc_type)
             strategy = strategy_cls(profile, doc_json, tables_data, doc_meta)
             strategy.prepare()
             strat_reqs = strategy.extract_requirements()
             strat_reqs = strategy.postprocess(strat_reqs)
-            existing_uids = {r.requirement_uid for r in requirements}
-            added = 0
-            for r in strat_reqs:
-                if r.requirement_uid not in existing_uids:
-                    requirements.append(r)
-                    added += 1
+            added = len(_merge_new_requirements(requirements, uid_index, strat_reqs))
             logger.info("Merged %d additional strategy TPS requirements (post marker-first)", added)
         except Exception:
             logger.warning("Could not merge strategy-based TPS requirements after marker-first", exc_info=True)
@@ -935,21 +1092,16 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
 
     # Hybrid safety net: if classified TPS but we see many RS markers in text and few TPS requirements extracted, run RS extractor too.
     if profile.doc_type == "TPS":
-        text_block_text = "\n".join([b.get("text", "") for b in doc_json.get("blocks", []) if isinstance(b, dict) and b.get("type") == "paragraph"])[:200000]
-        rs_marker_matches = re.findall(r'#\s*\d+\s*\.\s*\d+', text_block_text)
-        if len(rs_marker_matches) >= 15:
+        text_block_text = _paragraph_text(doc_json, _HYBRID_TEXT_LIMIT)
+        rs_marker_count = _count_rs_markers(text_block_text)
+        if rs_marker_count >= 15:
             tps_count = len(requirements)
-            logger.info("Hybrid check: found %d RS-style markers in text while TPS produced %d requirements; running RS extractor additionally", len(rs_marker_matches), tps_count)
+            logger.info("Hybrid check: found %d RS-style markers in text while TPS produced %d requirements; running RS extractor additionally", rs_marker_count, tps_count)
             try:
                 rs_reqs = extract_from_rs_text(doc_json, {**doc_meta, "document_type": "RS"})
                 # Also pick markers inside tables not converted to paragraphs
-                from pathlib import Path as _P  # local import to avoid polluting global namespace
                 try:
-                    tables_path = out_dir / "tables_data.json"
-                    tables_data_local = {}
-                    if tables_path.exists():
-                        tables_data_local = json.loads(tables_path.read_text(encoding="utf-8"))
-                    rs_table_reqs = extract_rs_markers_from_tables(tables_data_local, {**doc_meta, "document_type": "RS"})
+                    rs_table_reqs = extract_rs_markers_from_tables(tables_data or {}, {**doc_meta, "document_type": "RS"})
                     if rs_table_reqs:
                         rs_reqs.extend(rs_table_reqs)
                 except Exception:
@@ -966,22 +1118,25 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
 
         # Even if paragraph markers missing, attempt detection of RS markers inside tables to decide on remap
         try:
-            tables_path = out_dir / "tables_data.json"
-            if tables_path.exists():
-                tables_data_local = json.loads(tables_path.read_text(encoding="utf-8"))
-            else:
-                tables_data_local = {}
-            table_csv_concat = "\n".join(t.get("csv_data", "") for t in tables_data_local.values())
-            table_rs_markers = re.findall(r'#\s*\d+\s*\.\s*\d+', table_csv_concat)
+            # Reuse the tables_data parsed at the top instead of re-reading tables_data.json
+            # Count per table rather than over one large joined string
+            table_rs_marker_count = sum(_count_rs_markers(t.get("csv_data", "")) for t in (tables_data or {}).values())
             # Heuristic: if many RS markers exist and most TPS requirement_uids look numeric, remap to RS
-            if len(table_rs_markers) >= 40:
-                numeric_tps = [r for r in requirements if re.fullmatch(r'TPS:(\d{2,4}(?:\.\d+)?)', r.requirement_uid)]
+            if table_rs_marker_count >= 40:
+                # Single pass: collect numeric TPS ids (with their number) and the RS ids they could collide with
+                numeric_tps = []
+                seen_rs = set()
+                for r in requirements:
+                    uid = r.requirement_uid
+                    m_num = _TPS_NUM_UID_RE.fullmatch(uid)
+                    if m_num:
+                        numeric_tps.append((r, m_num.group(1)))
+                    elif uid.startswith("RS:"):
+                        seen_rs.add(uid)
                 if numeric_tps and (len(numeric_tps) / max(1, len(requirements))) >= 0.4:
-                    logger.info("Remapping %d TPS numeric IDs to RS:# form based on %d RS markers in tables", len(numeric_tps), len(table_rs_markers))
-                    seen_rs = {r.requirement_uid for r in requirements}
+                    logger.info("Remapping %d TPS numeric IDs to RS:# form based on %d RS markers in tables", len(numeric_tps), table_rs_marker_count)
                     converted = 0
-                    for r in numeric_tps:
-                        num_part = r.requirement_uid.split(':',1)[1]
+                    for r, num_part in numeric_tps:
                         # ensure decimal #x.y pattern (#057.0) -> keep as is
                         if '.' not in num_part:
                             num_part = f"{num_part}.0"
@@ -997,22 +1152,24 @@ def extract_requirements(out_dir: Path, force_type: str | None = None, marker_fi
             logger.debug("RS remap heuristic failed", exc_info=True)
 
     # If document truly seems RS but misclassified (RS markers overwhelm tables), re-label for downstream users
-    if profile.doc_type == "TPS" and sum(1 for r in requirements if r.requirement_uid.startswith("RS:")) > sum(1 for r in requirements if r.requirement_uid.startswith("TPS:")):
-        logger.info("Re-labeling document_type to RS due to majority RS-style requirements after hybrid extraction")
-        doc_meta["document_type"] = "RS"
+    if profile.doc_type == "TPS":
+        # Tally "<prefix>:" UID prefixes in one pass; uids without a colon are not counted
+        uid_prefixes = Counter(
+            prefix for prefix, sep, _ in (r.requirement_uid.partition(":") for r in requirements) if sep
+        )
+        if uid_prefixes["RS"] > uid_prefixes["TPS"]:
+            logger.info("Re-labeling document_type to RS due to majority RS-style requirements after hybrid extraction")
+            doc_meta["document_type"] = "RS"
 
     output_files = {}
 
-    # Write JSONL
+    # Write JSONL + CSV in one pass over the requirements
     jsonl_path = out_dir / "requirements.jsonl"
-    write_requirements_jsonl(requirements, jsonl_path)
-    output_files["requirements_jsonl"] = str(jsonl_path)
-    logger.info("Wrote requirements to %s", jsonl_path)
-
-    # Write CSV
     csv_path = out_dir / "requirements.csv"
-    write_requirements_csv(requirements, csv_path)
+    write_requirements_outputs(requirements, jsonl_path, csv_path)
+    output_files["requirements_jsonl"] = str(jsonl_path)
     output_files["requirements_csv"] = str(csv_path)
+    logger.info("Wrote requirements to %s", jsonl_path)
     logger.info("Wrote requirements to %s", csv_path)
 
     return output_files
@@ -1038,10 +1195,19 @@ def main(argv: Optional[list] = None) -> int:
     parser.add_argument("--force-type", choices=["RS","TPS","UNKNOWN"], help="Force document type (skip classification)")
     parser.add_argument("--no-marker-first", action="store_true", help="Disable marker-first segmentation and force strategy-based extraction path")
     parser.add_argument("--compare-tables-pre-post", action="store_true", help="Export pre/post Pandoc tables snapshots for side-by-side comparison")
+    parser.add_argument("--include-html-tables", action="store_true", help="Include per-table HTML (html_data) in tables_data.json")
+    parser.add_argument("--sort-structural-merge", action="store_true", help="Rewrite requirements outputs sorted by requirement_uid after merging structural DOCX requirements (default: append)")
     args = parser.parse_args(argv)
 
     # Early path: dedicated bank statement extraction (PDF -> CSV)
     if args.bank_statement:
+        from statement_extractor import (
+            parse_statement_pdf,
+            STATEMENT_FIELDS,
+            parse_statement_text,
+            excel_preserve_numeric_string,
+            enrich_amounts_from_text,
+        )
         level = getattr(logging, args.log_level.upper(), logging.INFO)
         logfile = Path(args.log_file) if args.log_file else None
         setup_logging(level=level, logfile=logfile)
@@ -1086,24 +1252,24 @@ def main(argv: Optional[list] = None) -> int:
             base_dir = ensure_output_base()
             out_csv_path = base_dir / f"statement_{stmt_path.stem}.csv"
         # Write CSV
-        import csv
         # Use UTF-8 with BOM for better Excel handling of Danish characters
-        with out_csv_path.open('w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=STATEMENT_FIELDS)
-            writer.writeheader()
-            preserve_fields = {"Billetnummer"}
+        # Column index of the Excel-preserved field, resolved once (-1 when disabled)
+        preserve_idx = STATEMENT_FIELDS.index("Billetnummer") if args.excel_preserve else -1
+        # 1 MB buffer: rows are small, so this keeps the write syscalls to a handful
+        with out_csv_path.open('w', newline='', encoding='utf-8-sig', buffering=1 << 20) as f:
+            writer = csv.writer(f)
+            writer.writerow(STATEMENT_FIELDS)
             for rec in rows:
-                out_row = {}
-                for k in STATEMENT_FIELDS:
-                    v = rec.get(k, '')
-                    if args.excel_preserve and k in preserve_fields:
-                        if isinstance(v, str) and v.isdigit():
-                            v = f'="{v}"'
-                        else:
-                            v = excel_preserve_numeric_string(v, mode="apostrophe")
-                    out_row[k] = v
-                if args.excel_preserve and out_row.get('Billetnummer','').startswith("'"):
-                    logger.debug("Preserved Billetnummer=%s", out_row['Billetnummer'])
+                out_row = [rec.get(k, '') for k in STATEMENT_FIELDS]
+                if preserve_idx >= 0:
+                    v = out_row[preserve_idx]
+                    if isinstance(v, str) and v.isdigit():
+                        v = f'="{v}"'
+                    else:
+                        v = excel_preserve_numeric_string(v, mode="apostrophe")
+                    out_row[preserve_idx] = v
+                    if isinstance(v, str) and v.startswith("'"):
+                        logger.debug("Preserved Billetnummer=%s", v)
                 writer.writerow(out_row)
         logger.info("Extracted %d transactions -> %s", len(rows), out_csv_path)
         return 0
@@ -1122,7 +1288,7 @@ def main(argv: Optional[list] = None) -> int:
     logfile = Path(args.log_file) if args.log_file else None
     setup_logging(level=level, logfile=logfile)
 
-    logger = logging.getLogger("simple")
+    logger = _LOG
     source_path = Path(args.source) if args.source else None
 
     if source_path:
@@ -1140,7 +1306,9 @@ def main(argv: Optional[list] = None) -> int:
                 use_pandoc_normalization=use_normalization,
                 force_type=args.force_type,
                 marker_first=(not args.no_marker_first),
-                compare_tables_pre_post=args.compare_tables_pre_post
+                compare_tables_pre_post=args.compare_tables_pre_post,
+                sort_structural_merge=args.sort_structural_merge,
+                include_html_tables=args.include_html_tables
             )
             logger.info("All files written to directory: %s", out_dir)
             final_out_dir = Path(output_files.get("output_dir", out_dir))
@@ -1180,7 +1348,9 @@ def main(argv: Optional[list] = None) -> int:
                 use_pandoc_normalization=use_normalization,
                 force_type=args.force_type,
                 marker_first=(not args.no_marker_first),
-                compare_tables_pre_post=args.compare_tables_pre_post
+                compare_tables_pre_post=args.compare_tables_pre_post,
+                sort_structural_merge=args.sort_structural_merge,
+                include_html_tables=args.include_html_tables
             )
             logger.info("All files written to directory: %s", out_dir)
             final_out_dir = Path(output_files.get("output_dir", out_dir))
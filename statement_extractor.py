@@ -1,12 +1,17 @@
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Iterable
+from typing import List, Dict
 
 try:
     # Prefer pdfminer.six if installed (robust text layout)
     from pdfminer.high_level import extract_text as _pdf_extract_text  # type: ignore
+    from pdfminer.layout import LAParams  # type: ignore
+    # Default layout parameters, built once and shared by every extraction
+    _LAPARAMS = LAParams()
 except Exception:  # pragma: no cover
     _pdf_extract_text = None  # type: ignore
+    _LAPARAMS = None
 
 __all__ = [
     "parse_statement_pdf",
@@ -31,6 +36,10 @@ STATEMENT_FIELDS = [
     "Rejsebureau momsbeløb",
     "Beløb DKK",
 ]
+# Fixed key order for per-record passes (records are built with exactly these keys)
+_STATEMENT_FIELDS_TUPLE = tuple(STATEMENT_FIELDS)
+# Blank record template; parse_statement_text copies it per header
+_EMPTY_RECORD = dict.fromkeys(STATEMENT_FIELDS, "")
 
 # Precompile patterns for field lines (Danish labels followed by colon)
 FIELD_PATTERNS = {
@@ -45,17 +54,80 @@ FIELD_PATTERNS = {
     "Rejsebureau momsbeløb": re.compile(r"^Rejsebureau momsbeløb\s*:\s*(?P<val>.*)$", re.IGNORECASE),
 }
 
+# Simple label detection (exact line match like 'MedarbejderID:') -> field name
+_SIMPLE_LABELS = {f + ':': f for f in FIELD_PATTERNS}
+
+# All field labels as one anchored alternation: a single scan per line instead of one per pattern.
+# Each label gets its own group so m.lastgroup identifies the field; the value is the rest of the line.
+_LABEL_GROUPS = {f"f{idx}": name for idx, name in enumerate(FIELD_PATTERNS)}
+_LABEL_UNION_RE = re.compile(
+    r"^(?:" + "|".join(f"(?P<{g}>{re.escape(name)})" for g, name in _LABEL_GROUPS.items()) + r")\s*:\s*",
+    re.IGNORECASE,
+)
+
 # Heuristic (refined): Egencia style IDs observed like 'DKSC140289938' (prefix letters then digits).
 # We tighten the pattern to reduce false positives where ordinary value lines (e.g. hotel names)
 # were previously mis-identified as headers, producing spurious rows in the CSV.
 # Pattern: 3-6 uppercase letters followed by 5+ digits. Anything after is free text.
 ID_LINE_RE = re.compile(r"^(?P<id>[A-Z]{3,6}[0-9]{5,})\b.*$")
 
+# A line holding nothing but an amount with two decimals (e.g. '-74,25')
+_AMOUNT_ONLY_RE = re.compile(r'^-?\d+[.,]\d{2}$')
+# Header line ending in an amount token; group 1 is the header without it
+_HEADER_TRAILING_AMOUNT_RE = re.compile(r'(.*)\s-?\d+[.,]\d{2}$')
 
-def _iter_lines(text: str) -> Iterable[str]:
-    for raw in text.splitlines():
-        # Normalize stray CR and trim right-side spaces only; keep left for potential leading IDs
-        yield raw.rstrip()
+# Per-line kinds computed once by _classify_lines
+_KIND_EMPTY, _KIND_ID, _KIND_LABEL, _KIND_AMOUNT, _KIND_OTHER = range(5)
+
+# ID header, label and amount-only tests fused into one alternation, tried in that order
+# (same precedence as checking ID_LINE_RE, _LABEL_UNION_RE and _AMOUNT_ONLY_RE in turn).
+# The case-sensitive first-letter lookahead lets most value lines skip the case-folded label
+# branch; no other character case-folds to these letters, so matches are unchanged.
+_LABEL_FIRST_CHARS = "".join(sorted({c for name in FIELD_PATTERNS for c in (name[0].upper(), name[0].lower())}))
+_LINE_KIND_RE = re.compile(
+    r"(?P<id>[A-Z]{3,6}[0-9]{5,}\b)"
+    r"|(?P<label>(?=[" + _LABEL_FIRST_CHARS + r"])(?i:" + "|".join(re.escape(name) for name in FIELD_PATTERNS) + r")\s*:)"
+    r"|(?P<amount>-?\d+[.,]\d{2}$)"
+)
+_KIND_BY_GROUP = {"id": _KIND_ID, "label": _KIND_LABEL, "amount": _KIND_AMOUNT}
+# How many lines after an ID line may hold its first label for it to count as a header
+_HEADER_LOOKAHEAD = 12
+
+
+def _looks_like_id(s: str) -> bool:
+    """Cheap pre-filter for ID_LINE_RE: at least 8 chars starting with 3 ASCII uppercase letters."""
+    head = s[:3]
+    return len(s) >= 8 and head.isascii() and head.isalpha() and head.isupper()
+
+
+def _classify_lines(stripped: List[str]) -> bytearray:
+    """Return one _KIND_* code per stripped line (one regex match per non-empty line)."""
+    kinds = bytearray(len(stripped))  # zero-filled == _KIND_EMPTY
+    for idx, t in enumerate(stripped):
+        if t:
+            m = _LINE_KIND_RE.match(t)
+            kinds[idx] = _KIND_BY_GROUP[m.lastgroup] if m else _KIND_OTHER
+    return kinds
+
+
+def _label_ahead(kinds: bytearray, window: int = _HEADER_LOOKAHEAD) -> bytearray:
+    """Flag lines where a label occurs within `window` lines from there, before any ID header.
+
+    Single reverse pass; the flag of line i+1 answers the header lookahead for line i.
+    """
+    n = len(kinds)
+    flags = bytearray(n + 1)  # trailing sentinel keeps flags[i + 1] valid for the last line
+    dist = window  # lines from the current position to the next usable label (window == none)
+    for idx in range(n - 1, -1, -1):
+        kind = kinds[idx]
+        if kind == _KIND_LABEL:
+            dist = 0
+        elif kind == _KIND_ID:
+            dist = window
+        elif dist < window:
+            dist += 1
+        flags[idx] = dist < window
+    return flags
 
 
 def parse_statement_text(text: str) -> List[Dict[str, str]]:
@@ -70,37 +142,23 @@ def parse_statement_text(text: str) -> List[Dict[str, str]]:
 
     We iterate linearly and build records accordingly; this avoids mis-grouping across blocks.
     """
-    lines = [l.rstrip() for l in text.splitlines()]
+    # Strip and classify every line once; the loops below only index into these
+    stripped = [l.strip() for l in text.splitlines()]
+    kinds = _classify_lines(stripped)
+    label_ahead = _label_ahead(kinds)
     records: List[Dict[str,str]] = []
     i = 0
-    n = len(lines)
-    label_key_map = {k:k for k in FIELD_PATTERNS.keys()}
-    # Pre-build simple label detection (exact line match like 'MedarbejderID:')
-    simple_labels = {f+':': f for f in FIELD_PATTERNS.keys()}
+    n = len(stripped)
     last_record: Dict[str,str] | None = None
     # Amount detection heuristics removed; enrichment file provides amounts.
     while i < n:
-        raw_line = lines[i].rstrip('\n')
-        raw = raw_line.strip().replace('\u00a0',' ')
-        if not raw:
+        if kinds[i] == _KIND_EMPTY:
             i += 1
             continue
-        m = ID_LINE_RE.match(raw)
-        if m:
+        raw = stripped[i].replace('\u00a0',' ')
+        if kinds[i] == _KIND_ID:
             # Relaxed header validation: accept if we find at least one inline label within next lines
-            look = i + 1
-            found_inline_label = False
-            scanned = 0
-            while look < n and scanned < 12:
-                probe = lines[look].strip()
-                if any(pat.match(probe) for pat in FIELD_PATTERNS.values()):
-                    found_inline_label = True
-                    break
-                if ID_LINE_RE.match(probe):
-                    break
-                look += 1
-                scanned += 1
-            if not found_inline_label:
+            if not label_ahead[i + 1]:
                 # treat as continuation of previous Rute
                 if last_record is not None:
                     if last_record.get('Rute'):
@@ -112,7 +170,7 @@ def parse_statement_text(text: str) -> List[Dict[str, str]]:
             # Genuine header
             # Remove trailing amount token (space + number) from header; external enrichment supplies amount
             header = raw
-            m_amt = re.search(r'(.*)\s-?\d+[.,]\d{2}$', header)
+            m_amt = _HEADER_TRAILING_AMOUNT_RE.search(header)
             if m_amt:
                 header = m_amt.group(1)
             # Reset per-record amount probe
@@ -122,54 +180,50 @@ def parse_statement_text(text: str) -> List[Dict[str, str]]:
             values: List[str] = []
             # (Standalone amount probe removed.)
             while j < n:
-                t = lines[j].strip()
+                t = stripped[j]
                 if not t:
                     j += 1
                     break
                 # Support inline label:value lines in the same block
-                inline_matched = False
-                for fname, pat in FIELD_PATTERNS.items():
-                    mline = pat.match(t)
-                    if mline:
-                        if fname not in label_order:
-                            label_order.append(fname)
-                        # Store inline value immediately by appending to values list
-                        values_inline_val = mline.group('val').strip()
-                        # Normalize tax decimal comma
-                        if fname == 'Rejsebureau momsbeløb':
-                            values_inline_val = values_inline_val.replace(',', '.')
-                        # Ensure position alignment: append placeholder if needed
-                        # We'll simply append; later assignment enumerates label_order sequentially.
-                        values.append(values_inline_val)
-                        inline_matched = True
-                        j += 1
-                        break
-                if inline_matched:
+                mline = _LABEL_UNION_RE.match(t) if kinds[j] == _KIND_LABEL else None
+                if mline:
+                    fname = _LABEL_GROUPS[mline.lastgroup]
+                    if fname not in label_order:
+                        label_order.append(fname)
+                    # Store inline value immediately by appending to values list
+                    values_inline_val = t[mline.end():].strip()
+                    # Normalize tax decimal comma
+                    if fname == 'Rejsebureau momsbeløb':
+                        values_inline_val = values_inline_val.replace(',', '.')
+                    # Ensure position alignment: append placeholder if needed
+                    # We'll simply append; later assignment enumerates label_order sequentially.
+                    values.append(values_inline_val)
+                    j += 1
                     continue
-                if t in simple_labels:
-                    label_order.append(simple_labels[t])
+                if t in _SIMPLE_LABELS:
+                    label_order.append(_SIMPLE_LABELS[t])
                     j += 1
                     continue
-                if ID_LINE_RE.match(t):
+                if kinds[j] == _KIND_ID:
                     break
                 break
             k = j
             while k < n:
-                t = lines[k].strip()
-                if not t:
+                kind = kinds[k]
+                if kind == _KIND_EMPTY:
                     k += 1
                     continue
-                if ID_LINE_RE.match(t) and values:
+                if kind == _KIND_ID and values:
                     break
                 if len(values) >= len(label_order)+1:
-                    if ID_LINE_RE.match(t):
+                    if kind == _KIND_ID:
                         break
                 # Skip further value collection if this is another label line (already captured inline)
-                if any(pat.match(t) for pat in FIELD_PATTERNS.values()):
+                if kind == _KIND_LABEL:
                     break
-                values.append(t)
+                values.append(stripped[k])
                 k += 1
-                if len(values) >= len(label_order) and k < n and ID_LINE_RE.match(lines[k].strip()):
+                if len(values) >= len(label_order) and k < n and kinds[k] == _KIND_ID:
                     break
             if len(label_order) < 2:
                 # Safety: abandon if not enough labels after all (shouldn't happen here)
@@ -180,7 +234,7 @@ def parse_statement_text(text: str) -> List[Dict[str, str]]:
                         last_record['Rute'] = header
                 i += 1
                 continue
-            rec = {field: "" for field in STATEMENT_FIELDS}
+            rec = _EMPTY_RECORD.copy()
             rec['ID'] = header.strip()
             for idx_label, field in enumerate(label_order):
                 if idx_label < len(values):
@@ -194,11 +248,11 @@ def parse_statement_text(text: str) -> List[Dict[str, str]]:
                         extra_candidate = None
                         if len(values) > len(label_order):
                             extra_candidate = values[-1]
-                        if extra_candidate and re.match(r'^-?\d+[.,]\d{2}$', extra_candidate):
+                        if extra_candidate and _AMOUNT_ONLY_RE.match(extra_candidate):
                             rec['Rejsebureau momsbeløb'] = extra_candidate.replace(',', '.')
                         elif not rec['Rejsebureau momsbeløb']:
                             for vv in reversed(values):
-                                if re.match(r'^-?\d+[.,]\d{2}$', vv):
+                                if _AMOUNT_ONLY_RE.match(vv):
                                     rec['Rejsebureau momsbeløb'] = vv.replace(',', '.')
                                     break
                 except ValueError:
@@ -207,33 +261,34 @@ def parse_statement_text(text: str) -> List[Dict[str, str]]:
             if rec.get('Rute'):
                 extras = []
                 for extra in values[len(label_order):]:
-                    if re.match(r'^-?\d+[.,]\d{2}$', extra):
+                    if _AMOUNT_ONLY_RE.match(extra):
                         # numeric already considered (tax or misaligned amount)
                         continue
-                    if ID_LINE_RE.match(extra):
+                    if _looks_like_id(extra) and ID_LINE_RE.match(extra):
                         continue
-                    if extra in (f+':' for f in FIELD_PATTERNS.keys()):
+                    if extra in _SIMPLE_LABELS:
                         continue
                     extras.append(extra)
                 if extras:
                     rec['Rute'] = (rec['Rute'] + ' ' + ' '.join(extras)).strip()
             # Internal Beløb DKK heuristics removed: value will be populated only via external enrichment.
-            for kf, vv in list(rec.items()):
-                rec[kf] = re.sub(r'\s+', ' ', vv).strip()
+            for kf in _STATEMENT_FIELDS_TUPLE:
+                vv = rec[kf]
+                if vv:
+                    # Collapse whitespace runs and trim (same whitespace set as \s)
+                    rec[kf] = ' '.join(vv.split())
             records.append(rec)
             last_record = rec
             i = k
             continue
         else:
             # Non-header stray line: attach to last record Rute if plausible (avoid duplicating values for other fields)
-            if last_record is not None:
-                # Skip if label-like or pure amount
-                if not raw.endswith(':') and not FIELD_PATTERNS['MedarbejderID'].match(raw):
-                    if not re.match(r'^-?\d+[.,]\d{2}$', raw):
-                        if last_record.get('Rute'):
-                            last_record['Rute'] += ' ' + raw
-                        else:
-                            last_record['Rute'] = raw
+            # Skip if label-like (any field label, or any line ending in ':') or pure amount
+            if last_record is not None and kinds[i] == _KIND_OTHER and not raw.endswith(':'):
+                if last_record.get('Rute'):
+                    last_record['Rute'] += ' ' + raw
+                else:
+                    last_record['Rute'] = raw
             i += 1
             continue
     return records
@@ -251,18 +306,14 @@ def excel_preserve_numeric_string(val: str, min_len: int = 10, mode: str = "form
     We treat any all-digit string meeting length or leading-zero criteria. If already protected
     (starts with =" or apostrophe) we return unchanged.
     """
-    if not isinstance(val, str):
+    if not isinstance(val, str) or not val:
         return val
-    v = val.strip()
-    if not v:
-        return v
-    if v.startswith("='") or v.startswith("=") and v.endswith(""):
+    # Only pay for strip() when there is surrounding whitespace
+    v = val.strip() if val[0].isspace() or val[-1].isspace() else val
+    # Already protected (formula or apostrophe prefix)
+    if v[:1] in ("'", "="):
         return v
-    if v.startswith("=") and v.startswith('="'):
-        return v
-    if v.startswith("'"):
-        return v
-    if v.isdigit() and (len(v) >= min_len or v.startswith('0')):
+    if v.isdigit() and (len(v) >= min_len or v[0] == '0'):
         if mode == 'apostrophe':
             return "'" + v
         # formula mode
@@ -271,6 +322,7 @@ def excel_preserve_numeric_string(val: str, min_len: int = 10, mode: str = "form
 
 
 AMOUNT_SUFFIX_RE = re.compile(r"^(?P<header>.+?)\s+(-?\d+[.,]\d{2})\s*$")
+_ID_TOKEN_RE = re.compile(r"[A-Z]{3,6}[0-9]{5,}")
 
 
 def parse_amount_header_text(text: str) -> dict:
@@ -286,19 +338,13 @@ def parse_amount_header_text(text: str) -> dict:
         m = AMOUNT_SUFFIX_RE.match(line)
         if not m:
             continue
-        amount = m.group(2) if m.lastindex and m.lastindex >= 2 else line.rsplit(' ',1)[-1]
-        amount_norm = amount.replace(',', '.')
-        # Extract ID token (first contiguous uppercase+digits segment length>=8)
-        parts = line.split()
-        if not parts:
-            continue
-        id_token = None
-        for p in parts:
-            if re.match(r'^[A-Z]{3,6}[0-9]{5,}$', p):
-                id_token = p
-                break
+        # Extract ID token (first contiguous uppercase+digits segment length>=8).
+        # It normally leads the line, so try that token before splitting the whole line.
+        id_token = line.split(None, 1)[0]
+        if not (_looks_like_id(id_token) and _ID_TOKEN_RE.fullmatch(id_token)):
+            id_token = next((p for p in line.split()[1:] if _looks_like_id(p) and _ID_TOKEN_RE.fullmatch(p)), None)
         if id_token:
-            mapping[id_token] = amount_norm
+            mapping[id_token] = m.group(2).replace(',', '.')
     return mapping
 
 
@@ -307,9 +353,16 @@ def enrich_amounts_from_text(rows: list[dict], amount_text: str) -> None:
     for rec in rows:
         full_id = rec.get('ID','')
         # Leading token (up to first space) is the canonical ID key
-        key = full_id.split()[0] if full_id else ''
-        if key in mapping:
-            rec['Beløb DKK'] = mapping[key]
+        key = full_id.split(None, 1)[0] if full_id else ''
+        amount = mapping.get(key)
+        if amount is not None:
+            rec['Beløb DKK'] = amount
+
+
+@lru_cache(maxsize=8)
+def _extract_pdf_text_cached(path_str: str, mtime_ns: int, size: int) -> str:
+    """pdfminer text for a file; mtime/size are part of the cache key so edits invalidate it."""
+    return _pdf_extract_text(path_str, laparams=_LAPARAMS, caching=True)
 
 
 def parse_statement_pdf(pdf_path: str | Path) -> List[Dict[str, str]]:
@@ -318,7 +371,8 @@ def parse_statement_pdf(pdf_path: str | Path) -> List[Dict[str, str]]:
         raise FileNotFoundError(path)
     if _pdf_extract_text is None:
         raise RuntimeError("pdfminer.six not installed; please pip install pdfminer.six to enable PDF parsing")
-    text = _pdf_extract_text(str(path))
+    st = path.stat()
+    text = _extract_pdf_text_cached(str(path), st.st_mtime_ns, st.st_size)
     return parse_statement_text(text)
 
 if __name__ == "__main__":  # simple manual debug
@@ -67,6 +67,22 @@ def test_multiline_route_aggregation():
     assert r2['Beløb DKK'] == ''
 
 
+def test_stray_label_line_not_appended_to_rute():
+    text = """DKSC999999999 EGENCIA DK TAC-HOTEL SOME HOTEL PROVIDER
+MedarbejderID: NA2
+Rute: CPHLHR
+
+Projektnummer: P1
+
+Cornmill Hotel(Hull)
+"""
+    rows = parse_statement_text(text)
+    assert len(rows) == 1, rows
+    # Unconsumed label lines are dropped; plain stray lines still extend Rute
+    assert 'Projektnummer' not in rows[0]['Rute']
+    assert rows[0]['Rute'] == 'CPHLHR Cornmill Hotel(Hull)'
+
+
 def test_excel_preserve_helper():
     # Apostrophe mode
     assert excel_preserve_numeric_string('0742748087132', mode='apostrophe').startswith("'0742748087132")
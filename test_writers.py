@@ -0,0 +1,73 @@
+import csv
+import json
+
+from models import Requirement, AcceptanceCriterion
+from writers import CSV_COLUMNS, write_requirements_outputs, append_requirements_jsonl, append_requirements_csv
+
+
+def _req(uid: str) -> Requirement:
+    return Requirement(
+        requirement_uid=uid,
+        doc_meta={"document_type": "RS"},
+        section_path=["Electrical", "Insulation"],
+        source_anchor={"type": "text", "ref": uid},
+        normative_strength="MUST",
+        canonical_statement=f"The generator shall meet {uid}, \"quoted\"",
+        requirement_raw="shall meet\nthe limit",
+        acceptance_criteria=[AcceptanceCriterion(id="numeric-5.0kV", text="<= 5 kV", comparator="<=", value=5.0, unit="kV")],
+        verification_method=None,
+        references=["IEC 60034-1"],
+        subject="generator",
+        category="electrical",
+        tags=[],
+        evidence_query="generator insulation",
+        confidence=0.9,
+    )
+
+
+def test_append_after_write_outputs(tmp_path):
+    jsonl_path = tmp_path / "requirements.jsonl"
+    csv_path = tmp_path / "requirements.csv"
+    write_requirements_outputs([_req("RS:#1.0"), _req("RS:#2.0")], jsonl_path, csv_path)
+    appended = [_req("DOCX:1"), _req("DOCX:2"), _req("DOCX:3")]
+    append_requirements_jsonl(appended, jsonl_path)
+    append_requirements_csv(appended, csv_path)
+
+    lines = jsonl_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 5
+    assert [json.loads(l)["requirement_uid"] for l in lines] == ["RS:#1.0", "RS:#2.0", "DOCX:1", "DOCX:2", "DOCX:3"]
+
+    with csv_path.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    # Header written once, and appended rows line up with it
+    assert rows[0] == CSV_COLUMNS
+    assert sum(1 for row in rows if row == CSV_COLUMNS) == 1
+    assert len(rows) == 6
+    for row in rows[1:]:
+        assert len(row) == len(CSV_COLUMNS)
+        record = dict(zip(CSV_COLUMNS, row))
+        assert record["section_path"] == "Electrical > Insulation"
+        assert json.loads(record["references"]) == ["IEC 60034-1"]
+        assert json.loads(record["acceptance_criteria"])[0]["unit"] == "kV"
+    assert [row[0] for row in rows[1:]] == ["RS:#1.0", "RS:#2.0", "DOCX:1", "DOCX:2", "DOCX:3"]
+
+
+def test_append_csv_creates_header_for_new_file(tmp_path):
+    csv_path = tmp_path / "requirements.csv"
+    append_requirements_csv([_req("DOCX:1")], csv_path)
+    with csv_path.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == CSV_COLUMNS
+    assert len(rows) == 2
+
+
+def test_csv_confidence_written_as_float(tmp_path):
+    csv_path = tmp_path / "requirements.csv"
+    reqs = [_req("RS:#1.0"), _req("RS:#2.0"), _req("RS:#3.0")]
+    reqs[0].confidence = 1
+    reqs[1].confidence = None
+    reqs[2].confidence = 0.5
+    write_requirements_outputs(reqs, tmp_path / "requirements.jsonl", csv_path)
+    with csv_path.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["confidence"] for row in rows] == ["1.0", "", "0.5"]
@@ -21,15 +21,24 @@ TARGET_IDS = [
     "DKSI144013930",
 ]
 
-amount_re = re.compile(r"-?\d{1,3}(?:\d{3})*(?:[.,]\d{2})$|-?\d+[.,]\d{2}$")
+amount_re = re.compile(r"-?\d+[.,]\d{2}$")
+# One alternation over all IDs; none overlaps another, so findall sees every hit
+_TARGET_RE = re.compile("|".join(map(re.escape, TARGET_IDS)))
+
 
 def main(pdf_path: str):
     text = extract_text(pdf_path)
     lines = text.splitlines()
-    id_set = set(TARGET_IDS)
+    # Strip each line once; both scans below work on the stripped form
+    stripped = [line.strip() for line in lines]
+    amount_search = amount_re.search
+    amount_match = amount_re.match
     for idx, line in enumerate(lines):
+        hits = set(_TARGET_RE.findall(line))
+        if not hits:
+            continue
         for tid in TARGET_IDS:
-            if tid in line:
+            if tid in hits:
                 # show context window
                 start = max(0, idx-3)
                 end = min(len(lines), idx+6)
@@ -37,20 +46,25 @@ def main(pdf_path: str):
                 for j in range(start, end):
                     mark = '>' if j == idx else ' '
                     amt = ''
-                    if amount_re.search(lines[j].strip()):
+                    if amount_search(stripped[j]):
                         amt = '  [AMOUNT?]'
                     print(f"{mark}{j:05d}: {lines[j]!r}{amt}")
                 print()
-    # Quick scan: amounts that appear on same line as header
+    # Quick scan: amounts that appear on same line as header (first header line per ID, single pass)
     inline_candidates = {}
-    for tid in TARGET_IDS:
-        for idx, line in enumerate(lines):
-            if line.strip().startswith(tid):
-                parts = line.strip().split()
-                last = parts[-1]
-                if amount_re.match(last):
-                    inline_candidates[tid] = last
-                break
+    pending = set(TARGET_IDS)
+    for s in stripped:
+        if not pending:
+            break
+        m = _TARGET_RE.match(s)
+        if m and m.group() in pending:
+            tid = m.group()
+            pending.discard(tid)
+            last = s.split()[-1]
+            if amount_match(last):
+                inline_candidates[tid] = last
+    # Report in TARGET_IDS order, as before
+    inline_candidates = {tid: inline_candidates[tid] for tid in TARGET_IDS if tid in inline_candidates}
     print("Inline header candidates:", inline_candidates)
 
 if __name__ == '__main__':
@@ -1,4 +1,7 @@
+import os
 import re
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
 from typing import List, Optional
 from models import AcceptanceCriterion
@@ -48,23 +51,32 @@ def normalize_unit(u: str) -> str:
     u = (u or "").strip()
     return NORM_UNITS_MAP.get(u, u)
 
+# Optional comparator, number, optional unit; scanned with finditer by extract_numbers_with_units
+_NUM_UNIT_RE = re.compile(
+    r'(?P<cmp>≤|>=|≥|<=|<|>|=|==)?\s*'
+    r'(?P<val>\d+(?:\.\d+)?)\s*'
+    r'(?P<unit>kV/µs|kV/μs|kV/us|kV RMS|V RMS|°C|C|V|kV|kHz|Hz|rpm|mm/s|m/s²|m/s2|mm|bar|%|dB\(A\))?'
+)
+
+def _iter_numbers_with_units(text: str):
+    """Yield (match, comparator, value, normalized unit) for each number in text."""
+    for m in _NUM_UNIT_RE.finditer(text):
+        cmp_raw, val_raw, unit_raw = m.group("cmp", "val", "unit")
+        # Captured comparators are all COMPARATOR_MAP keys and captured units carry no
+        # surrounding whitespace, so index the maps directly (normalize_unit would strip)
+        cmp_ = COMPARATOR_MAP[cmp_raw] if cmp_raw else "="
+        unit_norm = NORM_UNITS_MAP.get(unit_raw, unit_raw) if unit_raw else None
+        yield m, cmp_, float(val_raw), unit_norm
+
 def extract_numbers_with_units(text: str) -> List[AcceptanceCriterion]:
     """Extracts numeric values with units from a string."""
-    pattern = re.compile(
-        r'(?P<cmp>≤|>=|≥|<=|<|>|=|==)?\s*'
-        r'(?P<val>\d+(?:\.\d+)?)\s*'
-        r'(?P<unit>kV/µs|kV/μs|kV/us|kV RMS|V RMS|°C|C|V|kV|kHz|Hz|rpm|mm/s|m/s²|m/s2|mm|bar|%|dB\(A\))?'
-    )
-    crits = []
-    for m in pattern.finditer(text):
-        cmp_raw = m.group("cmp")
-        val = float(m.group("val"))
-        unit_raw = m.group("unit")
-        cmp_ = COMPARATOR_MAP.get(cmp_raw, "=") if cmp_raw else "="
-        unit_norm = normalize_unit(unit_raw) if unit_raw else None
-        crits.append(AcceptanceCriterion(id=f"numeric-{val}{unit_norm or ''}", text=m.group(0), comparator=cmp_, value=val, unit=unit_norm))
-    return crits
+    return [
+        AcceptanceCriterion(id=f"numeric-{val}{unit_norm or ''}", text=m.group(0), comparator=cmp_, value=val, unit=unit_norm)
+        for m, cmp_, val, unit_norm in _iter_numbers_with_units(text)
+    ]
 
+# Boilerplate repeats across requirements; results are immutable, so memoize them
+@lru_cache(maxsize=4096)
 def find_normative_strength(text: str) -> Optional[str]:
     """Finds the normative strength of a requirement statement."""
     text_lower = text.lower()
@@ -79,135 +91,159 @@ def find_normative_strength(text: str) -> Optional[str]:
 class SectionTracker:
     """Maintains a stack of section headings to track the current document path."""
     def __init__(self):
-        self._stack: List[tuple[int, str]] = []
+        # Parallel stacks: heading levels and heading texts (the current path)
+        self._levels: List[int] = []
+        self._path: List[str] = []
 
     def update_and_get_path(self, block: dict) -> List[str]:
         if block.get("type") == "heading":
             level = block.get("level", 1)
             text = block.get("text", "").strip()
             if text:
-                while self._stack and self._stack[-1][0] >= level:
-                    self._stack.pop()
-                self._stack.append((level, text))
-        return [text for level, text in self._stack]
+                levels, path = self._levels, self._path
+                while levels and levels[-1] >= level:
+                    levels.pop()
+                    path.pop()
+                levels.append(level)
+                path.append(text)
+        # Callers store the path on each Requirement, so hand out a copy
+        return self._path.copy()
 
+@lru_cache(maxsize=4096)
 def canonicalize(subject: str, raw: str) -> str:
     raw = raw.strip()
     if not raw:
         return f"The {subject} shall comply with unspecified requirements."
-    subject_lower = subject.lower()
-    raw_lower = raw.lower()
-    if (raw_lower.startswith(f"the {subject_lower}") or 
-        raw_lower.startswith(f"{subject_lower} ")):
-        return raw
-    if raw_lower.startswith("the "):
+    # Only the prefix decides the first check, so lowercase just a head slice of raw;
+    # "the <subject>" is covered by the plain "the " prefix
+    head_lower = raw[:max(64, len(subject) + 2)].lower()
+    if head_lower.startswith((f"{subject.lower()} ", "the ")):
         return raw
+    raw_lower = raw.lower()
     if " shall " in raw_lower or " must " in raw_lower:
         return raw
-    first_char = raw[0].lower() if raw else ""
-    rest = raw[1:] if len(raw) > 1 else ""
-    return f"The {subject} shall {first_char}{rest}"
+    return f"The {subject} shall {raw[0].lower()}{raw[1:]}"
 
 def infer_subject(section_path: List[str], raw_text: str, default: str = "generator") -> str:
     return default
 
+# Standard references, one named branch per family, scanned in a single pass.
+# The families cannot overlap, so this finds exactly what one findall per family would.
+_REF_FAMILIES = ("iec", "iso", "din", "ul", "csa")
+_REFERENCE_RE = re.compile(
+    r'\b(?:(?P<iec>IEC\s+\d+(?:-\d+)*(?::\d{4})?\b)'
+    r'|(?P<iso>ISO\s+\d+(?:-\d+)*(?::\d{4})?\b)'
+    r'|(?P<din>DIN\s+\d+(?:-\d+)*\b)'
+    r'|(?P<ul>UL\s+\d+(?:-\d+)*\b)'
+    r'|(?P<csa>CSA\s+[A-Z]+-\d+(?:-\d+)*\b))',
+    re.IGNORECASE,
+)
+
+# Cheap literal gate for collect_references: every reference starts with one of the
+# _REF_FAMILIES names. The extra characters are the ones IGNORECASE also folds onto
+# i and s but that lower() does not map to them.
+_REF_FOLD_ONLY_CHARS = ("\u0130", "\u0131", "\u017f")
+
 def collect_references(text: str) -> List[str]:
-    references = []
-    iec_pattern = r'\bIEC\s+\d+(?:-\d+)*(?::\d{4})?\b'
-    references.extend(re.findall(iec_pattern, text, re.IGNORECASE))
-    iso_pattern = r'\bISO\s+\d+(?:-\d+)*(?::\d{4})?\b'
-    references.extend(re.findall(iso_pattern, text, re.IGNORECASE))
-    din_pattern = r'\bDIN\s+\d+(?:-\d+)*\b'
-    references.extend(re.findall(din_pattern, text, re.IGNORECASE))
-    ul_pattern = r'\bUL\s+\d+(?:-\d+)*\b'
-    references.extend(re.findall(ul_pattern, text, re.IGNORECASE))
-    csa_pattern = r'\bCSA\s+[A-Z]+-\d+(?:-\d+)*\b'
-    references.extend(re.findall(csa_pattern, text, re.IGNORECASE))
-    seen = set()
-    unique_refs = []
-    for ref in references:
-        if ref not in seen:
-            seen.add(ref)
-            unique_refs.append(ref)
-    return unique_refs
+    text_lower = text.lower()
+    if not any(family in text_lower for family in _REF_FAMILIES) and not any(ch in text for ch in _REF_FOLD_ONLY_CHARS):
+        return []
+    # Bucket by family so results keep the IEC, ISO, DIN, UL, CSA grouping
+    by_family = {family: [] for family in _REF_FAMILIES}
+    for m in _REFERENCE_RE.finditer(text):
+        by_family[m.lastgroup].append(m.group())
+    # Order-preserving dedupe
+    return list(dict.fromkeys(ref for family in _REF_FAMILIES for ref in by_family[family]))
 
-def guess_category(section_path: List[str], raw_text: str) -> Optional[str]:
-    combined_text = " ".join(section_path + [raw_text]).lower()
-    environmental_keywords = [
+# Category keywords in priority order: the first category with any keyword in the text wins
+_CATEGORY_KEYWORDS = (
+    ("environmental", (
         "ip54", "ip55", "ip56", "enclosure protection", "ingress protection",
-        "humidity", "altitude", "environmental", "climate", "weather", 
+        "humidity", "altitude", "environmental", "climate", "weather",
         "corrosion", "coating", "sealing", "ingress", "operating temperature",
         "ambient temperature", "storage temperature"
-    ]
-    electrical_keywords = [
-        "voltage", "current", "power", "electrical", "insulation", "conductor", 
-        "winding", "stator", "rotor", "terminal", "connection", "earthing", 
+    )),
+    ("electrical", (
+        "voltage", "current", "power", "electrical", "insulation", "conductor",
+        "winding", "stator", "rotor", "terminal", "connection", "earthing",
         "grounding", "isolation", "dielectric", "breakdown", "surge", "overvoltage"
-    ]
-    mechanical_keywords = [
+    )),
+    ("mechanical", (
         "vibration", "mechanical", "shaft", "bearing", "housing", "mounting",
         "coupling", "alignment", "balancing", "deflection", "forces", "torque",
         "speed", "rpm", "rotation", "clearance", "tolerance", "dimension"
-    ]
-    control_keywords = [
+    )),
+    ("control", (
         "encoder", "sensor monitoring", "control system", "feedback", "signal",
-        "instrumentation", "measurement", "alarm", "trip", "pt100", 
+        "instrumentation", "measurement", "alarm", "trip", "pt100",
         "thermocouple", "pressure sensor", "flow sensor"
-    ]
-    safety_keywords = [
-        "safety", "emergency", "stop", "shutdown", "interlock", 
+    )),
+    ("safety", (
+        "safety", "emergency", "stop", "shutdown", "interlock",
         "guard", "barrier", "hazard", "risk", "fail-safe", "redundancy"
-    ]
-    if any(keyword in combined_text for keyword in environmental_keywords):
-        return "environmental"
-    elif any(keyword in combined_text for keyword in electrical_keywords):
-        return "electrical"
-    elif any(keyword in combined_text for keyword in mechanical_keywords):
-        return "mechanical"
-    elif any(keyword in combined_text for keyword in control_keywords):
-        return "control"
-    elif any(keyword in combined_text for keyword in safety_keywords):
-        return "safety"
+    )),
+)
+
+def guess_category(section_path: List[str], raw_text: str) -> Optional[str]:
+    # Section paths are lists; key the cache on a tuple copy
+    return _guess_category_cached(tuple(section_path), raw_text)
+
+@lru_cache(maxsize=4096)
+def _guess_category_cached(section_path: tuple, raw_text: str) -> Optional[str]:
+    combined_text = " ".join(section_path + (raw_text,)).lower()
+    for category, keywords in _CATEGORY_KEYWORDS:
+        if any(keyword in combined_text for keyword in keywords):
+            return category
     return None
 
+# make_evidence_query / build_output_subdir patterns and tables, built once at import
+_WORD_RE = re.compile(r'\b\w+\b')
+_WHITESPACE_RUN_RE = re.compile(r'\s+')
+_PATH_SEPARATORS_RE = re.compile(r'[\\/]+')
+
+_QUERY_STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for",
+    "of", "with", "by", "shall", "must", "should", "may", "will", "be",
+    "is", "are", "was", "were", "have", "has", "had", "do", "does", "did"
+})
+_QUERY_BOOST_TOKENS = frozenset({"ip54", "ip55", "ip56", "kv", "rpm", "hz", "degc"})
+_QUERY_KEYWORDS = ("protection", "enclosure", "voltage", "current",
+                   "vibration", "bearing", "stator", "rotor", "winding")
+# Shortest entry in _QUERY_KEYWORDS; shorter tokens cannot contain any of them
+_QUERY_KEYWORD_MIN_LEN = min(map(len, _QUERY_KEYWORDS))
+
 def make_evidence_query(subject: str, canonical: str, refs: List[str]) -> str:
     if not canonical.strip():
         return f"{subject} requirement"
-    stopwords = {
-        "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", 
-        "of", "with", "by", "shall", "must", "should", "may", "will", "be", 
-        "is", "are", "was", "were", "have", "has", "had", "do", "does", "did"
-    }
-    tokens = re.findall(r'\b\w+\b', canonical.lower())
-    content_tokens = [t for t in tokens if t not in stopwords and len(t) > 2]
+    tokens = _WORD_RE.findall(canonical.lower())
+    content_tokens = [t for t in tokens if t not in _QUERY_STOPWORDS and len(t) > 2]
+    subject_lower = subject.lower()
     scored_tokens = []
     for token in content_tokens:
         score = 0
-        if re.match(r'\d+', token) or token in ["ip54", "ip55", "ip56", "kv", "rpm", "hz", "degc"]:
+        # isdecimal() is the str test behind the old leading r'\d' match
+        if token[:1].isdecimal() or token in _QUERY_BOOST_TOKENS:
             score += 3
-        if any(keyword in token for keyword in ["protection", "enclosure", "voltage", "current", 
-                                               "vibration", "bearing", "stator", "rotor", "winding"]):
+        if len(token) >= _QUERY_KEYWORD_MIN_LEN and any(keyword in token for keyword in _QUERY_KEYWORDS):
             score += 2
-        if subject.lower() in token or token in subject.lower():
+        if subject_lower in token or token in subject_lower:
             score += 2
         score += 1
         scored_tokens.append((score, token))
     scored_tokens.sort(key=lambda x: (-x[0], x[1]))
     selected_tokens = [token for score, token in scored_tokens[:6]]
-    numeric_criteria = extract_numbers_with_units(canonical)
-    numeric_parts = []
-    for criterion in numeric_criteria[:2]:
-        comp = criterion.comparator
-        val = criterion.value
-        unit = criterion.unit or ""
-        numeric_parts.append(f"{comp} {val} {unit}".strip())
+    # Only the first two numbers are used, and no AcceptanceCriterion objects are needed
+    numeric_parts = [
+        f"{comp} {val} {unit or ''}".strip()
+        for _, comp, val, unit in islice(_iter_numbers_with_units(canonical), 2)
+    ]
     query_parts = [subject]
     query_parts.extend(selected_tokens[:4])
     query_parts.extend(numeric_parts)
     if refs:
         query_parts.extend(refs[:2])
     query = " ".join(query_parts)
-    query = re.sub(r'\s+', ' ', query)
+    query = _WHITESPACE_RUN_RE.sub(' ', query)
     query = query.strip()
     if len(query) > 120:
         safe_parts = [subject] + selected_tokens[:3]
@@ -243,13 +279,16 @@ def build_output_subdir(base_name: str) -> Path:
     the root 'output' directory. If directory exists, add `_runN` suffix.
     """
     out_base = ensure_output_base()
-    sanitized = re.sub(r'[\\/]+', '-', base_name).strip()
-    candidate = out_base / f"{sanitized}_output"
-    if not candidate.exists():
-        return candidate
-    suffix = 1
+    sanitized = _PATH_SEPARATORS_RE.sub('-', base_name).strip()
+    # One directory listing rules out taken names; only the chosen name is stat'ed
+    # (which also covers case-insensitive filesystems the listing can't speak for)
+    existing = set(os.listdir(out_base))
+    name = f"{sanitized}_output"
+    suffix = 0
     while True:
-        run_candidate = out_base / f"{sanitized}_output_run{suffix}"
-        if not run_candidate.exists():
-            return run_candidate
+        if name not in existing:
+            candidate = out_base / name
+            if not candidate.exists():
+                return candidate
         suffix += 1
+        name = f"{sanitized}_output_run{suffix}"
@@ -1,82 +1,147 @@
+import csv
 import json
-import pandas as pd
 from pathlib import Path
 from typing import List
 import dataclasses
 
-from models import Requirement
+from models import Requirement, AcceptanceCriterion
+
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
+
+def _jsonl_line(obj) -> bytes:
+    """Serialize obj as one newline-terminated UTF-8 JSONL record (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+_REQUIREMENT_FIELDS = tuple(f.name for f in dataclasses.fields(Requirement))
+_CRITERION_FIELDS = tuple(f.name for f in dataclasses.fields(AcceptanceCriterion))
+
+def _criterion_dict(ac):
+    """Shallow field dict for an AcceptanceCriterion (non-dataclass entries pass through)."""
+    if isinstance(ac, AcceptanceCriterion):
+        return {name: getattr(ac, name) for name in _CRITERION_FIELDS}
+    return ac
+
+def _requirement_dict(req: Requirement) -> dict:
+    """Field dict for serialization; same content as dataclasses.asdict without its deep copy."""
+    d = {name: getattr(req, name) for name in _REQUIREMENT_FIELDS}
+    if req.acceptance_criteria is not None:
+        d["acceptance_criteria"] = [_criterion_dict(ac) for ac in req.acceptance_criteria]
+    return d
 
 def write_requirements_jsonl(requirements: List[Requirement], file_path: Path):
     """Writes a list of Requirement objects to a JSONL file."""
-    with file_path.open("w", encoding="utf-8") as f:
-        for req in requirements:
-            f.write(json.dumps(dataclasses.asdict(req), ensure_ascii=False) + "\n")
+    # Stream lines through a large buffer rather than joining the whole file in memory
+    with file_path.open("wb", buffering=1 << 20) as f:
+        f.writelines(_jsonl_line(_requirement_dict(req)) for req in requirements)
+
+def append_requirements_jsonl(requirements: List[Requirement], file_path: Path):
+    """Appends Requirement objects to an existing (or new) JSONL file."""
+    with file_path.open("ab", buffering=1 << 20) as f:
+        f.writelines(_jsonl_line(_requirement_dict(req)) for req in requirements)
+
+# Define a stable set of CSV columns
+CSV_COLUMNS = [
+    "requirement_uid",
+    "section_path",
+    "normative_strength",
+    "canonical_statement",
+    "requirement_raw",
+    "acceptance_criteria",
+    "verification_method",
+    "references",
+    "subject",
+    "category",
+    "tags",
+    "evidence_query",
+    "doc_meta",
+    "source_anchor",
+    "conflicts",
+    "dependencies",
+    "page_range",
+    "parent_id",
+    "confidence",
+    "source_type",
+    "source_location",
+    "is_stub",
+    "raw_section_header",
+]
+# Header line as csv.writer emits it (plain column names need no quoting)
+_CSV_HEADER = ",".join(CSV_COLUMNS) + "\n"
+
+def _to_json(value):
+    return json.dumps(value, ensure_ascii=False) if value is not None else "null"
+
+def _csv_float(value):
+    """Write integers in a float column as floats (1 -> "1.0"), matching the old pandas output."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def _csv_row(req: Requirement) -> tuple:
+    """One CSV row as a tuple in CSV_COLUMNS order."""
+    return (
+        req.requirement_uid,
+        " > ".join(req.section_path or []),
+        req.normative_strength,
+        req.canonical_statement,
+        req.requirement_raw,
+        _to_json([_criterion_dict(ac) for ac in (req.acceptance_criteria or [])]),
+        req.verification_method,
+        _to_json(req.references or []),
+        req.subject,
+        req.category,
+        _to_json(req.tags or []),
+        req.evidence_query,
+        _to_json(req.doc_meta),
+        _to_json(req.source_anchor),
+        _to_json(req.conflicts or []),
+        _to_json(req.dependencies or []),
+        _to_json(req.page_range),
+        req.parent_id,
+        _csv_float(req.confidence),
+        getattr(req, 'source_type', None),
+        _to_json(getattr(req, 'source_location', None)),
+        getattr(req, 'is_stub', False),
+        getattr(req, 'raw_section_header', None),
+    )
 
 def write_requirements_csv(requirements: List[Requirement], file_path: Path):
     """Writes a list of Requirement objects to a CSV file.
 
     Complex fields (lists/dicts) are serialized as JSON strings to keep the CSV flat.
+    Rows are streamed through csv.writer.
     """
-    # Define a stable set of CSV columns
-    columns = [
-        "requirement_uid",
-        "section_path",
-        "normative_strength",
-        "canonical_statement",
-        "requirement_raw",
-        "acceptance_criteria",
-        "verification_method",
-        "references",
-        "subject",
-        "category",
-        "tags",
-        "evidence_query",
-        "doc_meta",
-        "source_anchor",
-        "conflicts",
-        "dependencies",
-        "page_range",
-        "parent_id",
-        "confidence",
-        "source_type",
-        "source_location",
-        "is_stub",
-        "raw_section_header",
-    ]
-
     if not requirements:
-        pd.DataFrame(columns=columns).to_csv(file_path, index=False)
+        file_path.write_bytes(_CSV_HEADER.encode("utf-8"))  # binary: no newline translation
         return
+    with file_path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        f.write(_CSV_HEADER)
+        csv.writer(f, lineterminator="\n").writerows(_csv_row(req) for req in requirements)
 
-    def to_json(value):
-        return json.dumps(value, ensure_ascii=False) if value is not None else "null"
-
-    records = []
-    for req in requirements:
-        records.append({
-            "requirement_uid": req.requirement_uid,
-            "section_path": " > ".join(req.section_path or []),
-            "normative_strength": req.normative_strength,
-            "canonical_statement": req.canonical_statement,
-            "requirement_raw": req.requirement_raw,
-            "acceptance_criteria": to_json([dataclasses.asdict(ac) for ac in (req.acceptance_criteria or [])]),
-            "verification_method": req.verification_method,
-            "references": to_json(req.references or []),
-            "subject": req.subject,
-            "category": req.category,
-            "tags": to_json(req.tags or []),
-            "evidence_query": req.evidence_query,
-            "doc_meta": to_json(req.doc_meta),
-            "source_anchor": to_json(req.source_anchor),
-            "conflicts": to_json(req.conflicts or []),
-            "dependencies": to_json(req.dependencies or []),
-            "page_range": to_json(req.page_range),
-            "parent_id": req.parent_id,
-            "confidence": req.confidence,
-            "source_type": getattr(req, 'source_type', None),
-            "source_location": to_json(getattr(req, 'source_location', None)),
-            "is_stub": getattr(req, 'is_stub', False),
-            "raw_section_header": getattr(req, 'raw_section_header', None),
-        })
-
-    pd.DataFrame(records, columns=columns).to_csv(file_path, index=False)
+def write_requirements_outputs(requirements: List[Requirement], jsonl_path: Path, csv_path: Path):
+    """Writes requirements to JSONL and CSV with a single pass over the list.
+
+    Each requirement is serialized once per format and streamed straight to both files.
+    """
+    with jsonl_path.open("wb", buffering=1 << 20) as jf, \
+            csv_path.open("w", encoding="utf-8", newline="", buffering=1 << 20) as cf:
+        cf.write(_CSV_HEADER)
+        writerow = csv.writer(cf, lineterminator="\n").writerow
+        for req in requirements:
+            jf.write(_jsonl_line(_requirement_dict(req)))
+            writerow(_csv_row(req))
+
+def append_requirements_csv(requirements: List[Requirement], file_path: Path):
+    """Appends Requirement rows to a CSV written by write_requirements_csv (header only if new)."""
+    if not requirements:
+        return
+    write_header = not file_path.exists()
+    with file_path.open("a", encoding="utf-8", newline="", buffering=1 << 20) as f:
+        if write_header:
+            f.write(_CSV_HEADER)
+        csv.writer(f, lineterminator="\n").writerows(_csv_row(req) for req in requirements)